@@ -1,13 +1,68 @@
+import datetime
+
 from django.contrib import admin
+from django.db import models
+from django.db.models import Max, Min
+from django.utils import timezone
 
 from .models import Comment, Group, Post
+from .paginators import EstimatedCountPaginator
+from .search import filter_matching, is_available
+
+
+def date_range(first, last, kind):
+    """Все даты уровня `kind` ('year', 'month' или 'day') от `first` до `last` включительно."""
+    if kind == 'year':
+        return [datetime.date(year, 1, 1) for year in range(first.year, last.year + 1)]
+    if kind == 'month':
+        months = range(first.year * 12 + first.month - 1, last.year * 12 + last.month)
+        return [datetime.date(month // 12, month % 12 + 1, 1) for month in months]
+    return [first + datetime.timedelta(days=day) for day in range((last - first).days + 1)]
+
+
+class DateBoundsQuerySet(models.QuerySet):
+    """dates() по MIN и MAX поля, которые берутся из индекса, вместо SELECT DISTINCT по всей выборке.
 
+    Так date_hierarchy админки не сканирует таблицу; в списке бывают и даты без записей.
+    """
 
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author')
+    def dates(self, field_name, kind, order='ASC'):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first, last = (
+            timezone.localtime(value).date() if isinstance(value, datetime.datetime) else value
+            for value in (bounds['first'], bounds['last'])
+        )
+        dates = date_range(first, last, kind)
+        return dates[::-1] if order == 'DESC' else dates
+
+
+class DateBoundsAdmin(admin.ModelAdmin):
+    def get_queryset(self, request):
+        # Как ModelAdmin.get_queryset, но от DateBoundsQuerySet: тег date_hierarchy вызывает cl.queryset.dates().
+        queryset = DateBoundsQuerySet(self.model, using=self.model._default_manager.db)
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+
+class PostAdmin(DateBoundsAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту идёт через полнотекстовый индекс, а не через LIKE '%...%'.
+        if search_term and is_available():
+            return filter_matching(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -16,9 +71,15 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text',)
+class CommentAdmin(DateBoundsAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post__author')
+    search_fields = ('=author__username',)
+    date_hierarchy = 'created'
+    raw_id_fields = ('post', 'author')
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(Post, PostAdmin)
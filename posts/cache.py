@@ -0,0 +1,155 @@
+import hashlib
+import math
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+
+from yatube.routers import current_replica
+
+GENERATION_KEY = 'generation:{}'
+
+
+def generation_key(scope):
+    return GENERATION_KEY.format(scope)
+
+
+def get_generations(scopes):
+    """Текущие поколения областей кэша; отсутствующие заводятся заново."""
+    keys = [generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Начальное значение от времени, чтобы после вытеснения счётчика
+            # не совпасть со старым поколением и не отдать устаревшую страницу.
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generations(*scopes):
+    for scope in scopes:
+        key = generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), timeout=None)
+
+
+def page_cache_key(key_prefix, request):
+    url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{key_prefix}:{request.user.pk or 0}:{url}'
+
+
+def page_etag(key_prefix, request, version):
+    """Слабый ETag страницы: зависит от адреса, пользователя и поколений её областей, а не от данных.
+
+    Секрет CSRF входит в ETag, чтобы после повторного входа браузер не показал
+    из своего кэша форму со старым токеном.
+    """
+    csrf_secret = request.META.get('CSRF_COOKIE', '')
+    source = f'{settings.PAGE_ETAG_VERSION}:{page_cache_key(key_prefix, request)}:{csrf_secret}:{version}'
+    return 'W/"{}"'.format(hashlib.md5(source.encode()).hexdigest())
+
+
+def get_or_recompute(key, compute, timeout, version=None, should_cache=None, beta=1.0, lock_timeout=10):
+    """Значение из кэша с защитой от лавины пересчётов.
+
+    Значение хранится вместе с версией, сроком годности и временем расчёта.
+    Незадолго до истечения срока запрос с вероятностью, растущей к концу
+    срока, берётся пересчитать значение заранее (вероятностное раннее
+    истечение). Пересчитывает только тот, кто захватил блокировку, остальные
+    тем временем получают прежнее значение или ждут первого расчёта.
+    """
+    return get_or_recompute_versioned(key, compute, timeout, version, should_cache, beta, lock_timeout)[0]
+
+
+def get_or_recompute_versioned(key, compute, timeout, version=None, should_cache=None, beta=1.0, lock_timeout=10):
+    """То же, что get_or_recompute, но вместе с версией отданного значения.
+
+    Во время чужого пересчёта отдаётся прежнее значение с его прежней версией.
+    """
+    envelope = cache.get(key)
+    if envelope is not None:
+        value, stored_version, expires_at, delta = envelope
+        early = delta * beta * math.log(1.0 - random.random())
+        if stored_version == version and time.time() - early < expires_at:
+            return value, version
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            started = time.time()
+            value = compute()
+            delta = time.time() - started
+            if should_cache is None or should_cache(value):
+                # Запись живёт дольше срока годности, чтобы было что отдавать во время пересчёта.
+                cache.set(key, (value, version, time.time() + timeout, delta), timeout * 2)
+        finally:
+            cache.delete(lock_key)
+        return value, version
+
+    if envelope is not None:
+        return envelope[0], envelope[1]
+    deadline = time.time() + lock_timeout
+    while time.time() < deadline:
+        time.sleep(0.05)
+        envelope = cache.get(key)
+        if envelope is not None and envelope[1] == version:
+            return envelope[0], version
+    return compute(), version
+
+
+def is_cacheable_response(response):
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def cache_versioned(scopes, key_prefix, timeout=None, store=True):
+    """Кэширует страницу, пока не сменится поколение одной из её областей.
+
+    `scopes` получает аргументы представления и возвращает список областей,
+    например ['index'] или ['group:<slug>']. Пока один запрос пересобирает
+    устаревшую страницу, остальные получают прежнюю версию. Из тех же
+    поколений строится ETag: клиенту с актуальной копией отвечаем 304, не
+    трогая базу; ETag всегда соответствует версии, которая отдана. С store=False
+    страница не кэшируется, остаётся только ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            generations = get_generations(scopes(request, *args, **kwargs))
+            version = '.'.join(str(generation) for generation in generations)
+            etag = page_etag(key_prefix, request, version)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                not_modified['ETag'] = etag
+                return not_modified
+            if store:
+                page_timeout = settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout
+                if current_replica():
+                    page_timeout = min(page_timeout, settings.DATABASE_REPLICA_PAGE_TIMEOUT)
+                response, served_version = get_or_recompute_versioned(
+                    page_cache_key(key_prefix, request),
+                    lambda: view(request, *args, **kwargs),
+                    page_timeout,
+                    version=version,
+                    should_cache=is_cacheable_response,
+                )
+                # Пока другой запрос пересобирает страницу, отдаётся прежняя версия: ETag тоже прежний,
+                # иначе клиент получал бы 304 на устаревшую копию до следующей смены поколения.
+                if served_version != version:
+                    etag = page_etag(key_prefix, request, served_version)
+            else:
+                response = view(request, *args, **kwargs)
+            # Страница с отстающей реплики могла не увидеть запись, сменившую поколение; ETag от неё
+            # подтверждал бы устаревшую копию ответами 304 до следующей записи.
+            if response.status_code == 200 and not current_replica():
+                response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,75 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from yatube.routers import use_primary
+
+from .models import Comment, Follow, Post, User, UserCounters
+
+
+def count_subquery(queryset, field):
+    counted = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+        count=Count('pk')
+    ).values('count')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def actual_user_counters(users):
+    """Пересчитанные с нуля счётчики: {id пользователя: (записей, подписчиков, подписок)}."""
+    rows = users.order_by().annotate(
+        posts_total=count_subquery(Post.objects.all(), 'author'),
+        followers_total=count_subquery(Follow.objects.all(), 'author'),
+        following_total=count_subquery(Follow.objects.all(), 'user'),
+    ).values_list('pk', 'posts_total', 'followers_total', 'following_total')
+    return {pk: counts for pk, *counts in rows}
+
+
+def recount_users(users):
+    """Переписывает счётчики пользователей по фактическим данным; возвращает id исправленных."""
+    actual = actual_user_counters(users)
+    stored = UserCounters.objects.in_bulk(list(actual))
+    created, updated = [], []
+    for pk, (posts, followers, following) in actual.items():
+        counters = stored.get(pk)
+        if counters is None:
+            created.append(UserCounters(user_id=pk, posts=posts, followers=followers, following=following))
+        elif (counters.posts, counters.followers, counters.following) != (posts, followers, following):
+            counters.posts, counters.followers, counters.following = posts, followers, following
+            updated.append(counters)
+    UserCounters.objects.bulk_create(created, ignore_conflicts=True)
+    UserCounters.objects.bulk_update(updated, ['posts', 'followers', 'following'])
+    return [counters.pk for counters in created + updated]
+
+
+def recount_comments(posts):
+    """Исправляет разошедшиеся Post.comments_count; возвращает id исправленных записей."""
+    drifted = posts.annotate(actual=count_subquery(Comment.objects.all(), 'post')).exclude(
+        comments_count=F('actual')
+    ).values_list('pk', 'actual')
+    fixed = []
+    for pk, actual in drifted:
+        Post.objects.filter(pk=pk).update(comments_count=actual)
+        fixed.append(pk)
+    return fixed
+
+
+def change_user_counters(user_id, **deltas):
+    """Атомарно сдвигает счётчики пользователя.
+
+    Если строки ещё нет, ничего не делается: при первом чтении её
+    посчитает get_user_counters, уже с учётом этого изменения.
+    """
+    if user_id is not None:
+        UserCounters.objects.filter(pk=user_id).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+
+def get_user_counters(user):
+    """Счётчики пользователя; отсутствующие считаются один раз по данным."""
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        # Пересчёт пишет в основную базу, поэтому и данные для него берутся оттуда, а не с реплики.
+        with use_primary():
+            recount_users(User.objects.filter(pk=user.pk))
+            return UserCounters.objects.get(pk=user.pk)
@@ -1,4 +1,6 @@
 from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.forms import ModelForm
 
 from .models import Comment, Post
@@ -9,6 +11,39 @@ class PostForm(ModelForm):
         model = Post
         fields = ('group', 'text', 'image')
 
+    def __init__(self, *args, oversized=(), **kwargs):
+        # Поля, файлы которых загрузчик отбросил по размеру (см. posts.uploadhandlers.oversized_uploads).
+        self.oversized = oversized
+        super().__init__(*args, **kwargs)
+
+    def clean_image(self):
+        """Отклоняет изображения с чрезмерным числом пикселей, не декодируя их.
+
+        ImageField уже открыл файл: Image.open читает только заголовок,
+        а verify() проверяет структуру без распаковки пикселей.
+        """
+        image = self.cleaned_data.get('image')
+        parsed = getattr(image, 'image', None)
+        max_pixels = settings.IMAGE_UPLOAD_MAX_PIXELS
+        if parsed is not None and parsed.width * parsed.height > max_pixels:
+            raise ValidationError(
+                'Изображение слишком большое: не больше %(max_pixels)s мегапикселей.',
+                code='too_many_pixels',
+                params={'max_pixels': max_pixels // 10 ** 6},
+            )
+        return image
+
+    def clean(self):
+        # Загрузчик бросил файл, как только тот превысил лимит, и ImageField его не видит:
+        # без этой ошибки запись сохранилась бы без изображения.
+        if self.add_prefix('image') in self.oversized:
+            self.add_error('image', ValidationError(
+                'Размер файла не должен превышать %(max_size)s МБ.',
+                code='file_too_large',
+                params={'max_size': settings.IMAGE_UPLOAD_MAX_SIZE // (1024 * 1024)},
+            ))
+        return super().clean()
+
 
 class CommentForm(forms.ModelForm):
     text = forms.CharField(widget=forms.Textarea)
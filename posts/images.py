@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+from sorl.thumbnail import get_thumbnail
+
+from .cache import bump_generations
+from .models import Post
+from .signals import post_scopes
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+THUMBNAIL_RATIO = 339 / 960
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix='thumbnails'
+            )
+        return _executor
+
+
+def image_key(prefix, name):
+    return f'{prefix}:{hashlib.md5(name.encode()).hexdigest()}'
+
+
+def thumbnail_key(name):
+    return image_key('thumbnail', name)
+
+
+def derivatives_key(name):
+    return image_key('derivatives', name)
+
+
+def failure_key(name):
+    return image_key('thumbnail_failed', name)
+
+
+def derivative_formats():
+    """Форматы из IMAGE_DERIVATIVE_FORMATS, которые умеет сохранять установленный Pillow."""
+    Image.init()
+    return [fmt for fmt in settings.IMAGE_DERIVATIVE_FORMATS if fmt.upper() in Image.SAVE]
+
+
+def derivative_name(name, width, fmt):
+    stem = os.path.splitext(name)[0]
+    return f'derivatives/{stem}/{width}.{fmt}'
+
+
+def render_derivatives(name, storage, force=False):
+    """Сохраняет уменьшенные копии в современных форматах и возвращает их srcset.
+
+    Исходник читается из `storage`, копии, как и миниатюры sorl, пишутся
+    в хранилище по умолчанию. Уже существующие файлы не пересчитываются,
+    ширины больше исходной пропускаются (кроме самой маленькой).
+    """
+    widths = sorted(settings.IMAGE_DERIVATIVE_WIDTHS)
+    source = None
+    sources = []
+    for fmt in derivative_formats():
+        srcset = []
+        for width in widths:
+            derivative = derivative_name(name, width, fmt)
+            if force or not default_storage.exists(derivative):
+                if source is None:
+                    with storage.open(name) as image_file:
+                        source = ImageOps.exif_transpose(Image.open(image_file)).convert('RGB')
+                if width > source.width and width != widths[0]:
+                    continue
+                resized = ImageOps.fit(source, (width, round(width * THUMBNAIL_RATIO)), Image.LANCZOS)
+                buffer = BytesIO()
+                resized.save(buffer, format=fmt.upper(), quality=settings.IMAGE_DERIVATIVE_QUALITY)
+                default_storage.delete(derivative)
+                derivative = default_storage.save(derivative, ContentFile(buffer.getvalue()))
+            srcset.append(f'{default_storage.url(derivative)} {width}w')
+        if srcset:
+            sources.append({'type': MIME_TYPES[fmt], 'srcset': ', '.join(srcset)})
+    return sources
+
+
+def invalidate_image_pages(name):
+    """Сбрасывает кэш страниц с записями, где стоит изображение: в них закэширован исходник."""
+    for post in Post.objects.filter(image=name).select_related('author'):
+        bump_generations(*post_scopes(post))
+
+
+def generate_thumbnail(image):
+    """Готовит миниатюру sorl и производные копии, запоминает их адреса для шаблонов и сбрасывает страницы."""
+    try:
+        thumbnail = get_thumbnail(image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+        if thumbnail.exists():
+            cache.set(thumbnail_key(image.name), thumbnail.url, None)
+        cache.set(derivatives_key(image.name), render_derivatives(image.name, image.storage), None)
+        invalidate_image_pages(image.name)
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюру %s', image.name)
+        # Битое изображение не ставится в очередь при каждом показе, пока не истечёт отметка.
+        cache.set(failure_key(image.name), True, settings.THUMBNAIL_RETRY_DELAY)
+    finally:
+        with _executor_lock:
+            _pending.discard(image.name)
+
+
+def generate_in_worker(image):
+    try:
+        generate_thumbnail(image)
+    finally:
+        connection.close()
+
+
+def schedule_thumbnail(image):
+    """Ставит миниатюру в очередь фоновых воркеров после фиксации транзакции."""
+    if not image:
+        return
+
+    def submit():
+        with _executor_lock:
+            if image.name in _pending:
+                return
+            _pending.add(image.name)
+        if settings.THUMBNAIL_ASYNC:
+            get_executor().submit(generate_in_worker, image)
+        else:
+            generate_thumbnail(image)
+
+    transaction.on_commit(submit)
+
+
+def picture(image):
+    """Адреса для <picture>: миниатюра (или исходник, пока она готовится) и srcset производных.
+
+    Читает только кэш: ни хранилище метаданных sorl, ни файловая система
+    на пути запроса не трогаются. После неудачной попытки миниатюра не
+    заказывается заново THUMBNAIL_RETRY_DELAY секунд.
+    """
+    if not image:
+        return None
+    keys = (thumbnail_key(image.name), derivatives_key(image.name))
+    found = cache.get_many(keys + (failure_key(image.name),))
+    if not all(key in found for key in keys) and failure_key(image.name) not in found:
+        schedule_thumbnail(image)
+    return {
+        'src': found.get(keys[0], image.url),
+        'sources': found.get(keys[1], []),
+    }
@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from yatube.sqlite_cache import SQLiteCache
+
+
+def make_backends(directory):
+    return {
+        'locmem': lambda: LocMemCache('bench', {'OPTIONS': {'MAX_ENTRIES': 10 ** 6}}),
+        'filebased': lambda: FileBasedCache(os.path.join(directory, 'files'), {'OPTIONS': {'MAX_ENTRIES': 10 ** 6}}),
+        'sqlite': lambda: SQLiteCache(os.path.join(directory, 'cache.sqlite3'), {'OPTIONS': {'MAX_ENTRIES': 10 ** 6}}),
+    }
+
+
+def run_writes(factory, worker, keys):
+    cache = factory()
+    for i in range(keys):
+        cache.set(f'worker:{worker}:{i}', i, None)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость и общий доступ из нескольких процессов для LocMem, файлового и SQLite-кэша.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=2000)
+        parser.add_argument('--value-size', type=int, default=20000, help='Размер значения в байтах.')
+        parser.add_argument('--workers', type=int, default=4, help='Сколько процессов пишут в кэш.')
+
+    def handle(self, *args, **options):
+        keys = options['keys']
+        value = 'x' * options['value_size']
+        self.stdout.write(
+            f'{"бэкенд":>10} {"set/с":>10} {"get/с":>10} {"incr/с":>10} {"видно из других процессов":>27}'
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for name, factory in make_backends(directory).items():
+                cache = factory()
+                set_rate = self.rate(keys, lambda i: cache.set(f'page:{i}', value, None))
+                get_rate = self.rate(keys, lambda i: cache.get(f'page:{i}'))
+                cache.set('counter', 0, None)
+                incr_rate = self.rate(keys, lambda i: cache.incr('counter'))
+                shared_hits = self.shared_hits(factory, keys, options['workers'])
+                self.stdout.write(
+                    f'{name:>10} {set_rate:>10.0f} {get_rate:>10.0f} {incr_rate:>10.0f} '
+                    f'{shared_hits:>27.0%}'
+                )
+
+    def rate(self, count, operation):
+        started = time.perf_counter()
+        for i in range(count):
+            operation(i)
+        return count / (time.perf_counter() - started)
+
+    def shared_hits(self, factory, keys, workers):
+        """Доля записей, сделанных воркерами-процессами, которую видит родительский процесс."""
+        context = multiprocessing.get_context('fork')
+        cache = factory()
+        processes = [context.Process(target=run_writes, args=(factory, worker, keys)) for worker in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        hits = sum(
+            cache.get(f'worker:{worker}:{i}') is not None
+            for worker in range(workers) for i in range(keys)
+        )
+        return hits / (keys * workers)
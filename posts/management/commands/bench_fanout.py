@@ -0,0 +1,100 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from posts.counters import recount_users
+from posts.models import Follow, Post, TimelineEntry, User
+from posts.timelines import timeline_page
+
+
+class Rollback(Exception):
+    pass
+
+
+def author_weights(authors, distribution):
+    if distribution == 'uniform':
+        return [1] * authors
+    return [1 / (rank + 1) for rank in range(authors)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает усиление записи и время чтения ленты при разных порогах '
+        'гибридной раскладки и распределениях подписчиков. Все данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=50)
+        parser.add_argument('--readers', type=int, default=2000)
+        parser.add_argument('--follows-per-reader', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=200, help='Сколько записей опубликовать.')
+        parser.add_argument('--reads', type=int, default=100, help='Сколько лент прочитать.')
+        parser.add_argument('--thresholds', type=int, nargs='+', default=[10 ** 9, 500, 100])
+        parser.add_argument('--distributions', nargs='+', default=['uniform', 'zipf'],
+                            choices=['uniform', 'zipf'])
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"распределение":>14} {"порог":>10} {"записей/пост":>13} '
+            f'{"мс/пост":>9} {"чтение p50":>11} {"чтение p95":>11}'
+        )
+        for distribution in options['distributions']:
+            for threshold in options['thresholds']:
+                with override_settings(
+                    TIMELINE_BACKEND='posts.timelines.DatabaseTimelineBackend',
+                    TIMELINE_FANOUT_THRESHOLD=threshold,
+                ):
+                    try:
+                        with transaction.atomic():
+                            row = self.run_case(distribution, options)
+                            raise Rollback
+                    except Rollback:
+                        pass
+                write_amplification, write_ms, read_p50, read_p95 = row
+                threshold_label = 'нет' if threshold >= 10 ** 9 else threshold
+                self.stdout.write(
+                    f'{distribution:>14} {threshold_label:>10} {write_amplification:>13.1f} '
+                    f'{write_ms:>9.2f} {read_p50:>9.2f}мс {read_p95:>9.2f}мс'
+                )
+
+    def run_case(self, distribution, options):
+        rng = random.Random(options['seed'])
+        User.objects.bulk_create(User(username=f'bench_author_{i}') for i in range(options['authors']))
+        User.objects.bulk_create(User(username=f'bench_reader_{i}') for i in range(options['readers']))
+        authors = list(User.objects.filter(username__startswith='bench_author_').order_by('id'))
+        readers = list(User.objects.filter(username__startswith='bench_reader_').order_by('id'))
+        weights = author_weights(len(authors), distribution)
+        follows = []
+        for reader in readers:
+            followed = set(rng.choices(authors, weights=weights, k=options['follows_per_reader']))
+            follows.extend(Follow(user=reader, author=author) for author in followed)
+        Follow.objects.bulk_create(follows)
+        # bulk_create обходит сигналы, а раскладка решается по счётчику подписчиков автора.
+        recount_users(User.objects.filter(pk__in=[author.pk for author in authors]))
+
+        entries_before = TimelineEntry.objects.count()
+        started = time.perf_counter()
+        for i in range(options['posts']):
+            author = rng.choices(authors, weights=weights)[0]
+            Post.objects.create(text=f'Тестовая запись {i}', author=author)
+        write_seconds = time.perf_counter() - started
+        written = TimelineEntry.objects.count() - entries_before
+
+        timings = []
+        for reader in rng.sample(readers, min(options['reads'], len(readers))):
+            started = time.perf_counter()
+            page, _ = timeline_page(reader, 1, 10)
+            list(page)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return (
+            written / options['posts'],
+            write_seconds * 1000 / options['posts'],
+            statistics.median(timings),
+            timings[int(len(timings) * 0.95) - 1],
+        )
@@ -0,0 +1,78 @@
+import statistics
+from copy import deepcopy
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve
+
+from posts.models import Follow, Group, Post
+from yatube.metrics import collect_stats, instrument_templates
+from yatube.template_cache import warm_templates
+
+
+def templates_setting(loaders):
+    templates = deepcopy(settings.TEMPLATES)
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время отрисовки шаблонов страниц без кэша шаблонов и с прогретым '
+        'cached.Loader. Нужна заполненная база, например seed_yatube.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Отрисовок каждой страницы в каждом режиме.')
+
+    def handle(self, *args, **options):
+        post = Post.objects.select_related('author').order_by('-pk').first()
+        if post is None:
+            raise CommandError('В базе нет записей: заполните её, например, командой seed_yatube.')
+        pages = {
+            'index': ('/', None),
+            'profile': (f'/{post.author.username}/', None),
+            'post': (f'/{post.author.username}/{post.pk}/', None),
+            'search': (f'/search/?q={post.text.split()[0]}', None),
+        }
+        group = Group.objects.order_by('pk').first()
+        if group is not None:
+            pages['group_posts'] = (f'/group/{group.slug}/', None)
+        follow = Follow.objects.select_related('user').order_by('pk').first()
+        if follow is not None:
+            pages['follow_index'] = ('/follow/', follow.user)
+
+        instrument_templates()
+        modes = {
+            'без кэша': settings.TEMPLATE_LOADERS,
+            'cached.Loader': [('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS)],
+        }
+        results = {}
+        # Кэш страниц выключен: каждая итерация действительно рисует шаблоны.
+        dummy_cache = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        for mode, loaders in modes.items():
+            with override_settings(TEMPLATES=templates_setting(loaders), CACHES=dummy_cache):
+                warm_templates()
+                for view, (path, user) in pages.items():
+                    results[view, mode] = self.measure(path, user, options['requests'])
+
+        self.stdout.write(f'{"страница":>13} {"без кэша, мс":>13} {"cached, мс":>11} {"ускорение":>10}')
+        for view in pages:
+            before, after = results[view, 'без кэша'], results[view, 'cached.Loader']
+            self.stdout.write(f'{view:>13} {before:>13.2f} {after:>11.2f} {before / after:>9.1f}×')
+
+    def measure(self, path, user, count):
+        """Медиана времени шаблонов на один запрос, в миллисекундах."""
+        factory = RequestFactory()
+        timings = []
+        for _ in range(count):
+            request = factory.get(path)
+            request.user = user or AnonymousUser()
+            match = resolve(request.path_info)
+            with collect_stats() as stats:
+                match.func(request, *match.args, **match.kwargs)
+            timings.append(stats.template_time * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,197 @@
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from posts.models import Follow, Group, Post, User
+from posts.seeding import seed
+
+VIEWS = ('index', 'group_posts', 'profile', 'post_view', 'follow_index', 'add_comment')
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет задержки (p50/p95/p99) и пропускную способность публичных страниц '
+        'на синтетических данных и сохраняет результат в JSON для сравнения между коммитами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=200, help='Запросов на страницу и режим кэша.')
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--views', nargs='+', choices=VIEWS, default=list(VIEWS))
+        parser.add_argument('--seed', type=int, default=1, help='Зерно генератора данных и выборки страниц.')
+        parser.add_argument(
+            '--use-existing', action='store_true',
+            help='Мерить на текущей базе (например, заполненной seed_yatube), не создавая временную.',
+        )
+        parser.add_argument('--output', help='Файл для JSON с результатами; по умолчанию — stdout.')
+        parser.add_argument('--compare', help='JSON прошлого прогона: показать изменение p95.')
+
+    def handle(self, *args, **options):
+        if options['use_existing']:
+            report = self.run(options)
+        else:
+            report = self.run_on_fresh_database(options)
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(text + '\n')
+        else:
+            self.stdout.write(text)
+        if options['compare']:
+            self.compare(report, options['compare'])
+
+    def run_on_fresh_database(self, options):
+        """Временная база на диске: одинаковые данные от прогона к прогону, рабочая не трогается."""
+        creation = connection.creation
+        old_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = f'{old_name}.bench'
+        creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stderr.write('Заполняю базу…')
+            options['dataset'] = seed(
+                users=options['users'], posts=options['posts'], comments=options['comments'],
+                follows_per_user=options['follows_per_user'], random_seed=options['seed'],
+                prefix='bench', log=lambda step: self.stderr.write(f'  {step}'),
+            )
+            return self.run(options)
+        finally:
+            creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        targets = self.targets(rng, options)
+        results = {}
+        # Общий с продакшеном кэш в бенчмарке не нужен: каждый прогон начинается с пустого.
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            cache.clear()
+            for view in options['views']:
+                results[view] = {
+                    'warm': self.measure(targets[view], options, cold=False),
+                    'cold': self.measure(targets[view], options, cold=True),
+                }
+                self.stderr.write(
+                    f'{view:>13}: p95 {results[view]["warm"]["p95_ms"]:.1f} мс (кэш), '
+                    f'{results[view]["cold"]["p95_ms"]:.1f} мс (без кэша)'
+                )
+        return {
+            'commit': current_commit(),
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'database': connection.vendor,
+            'dataset': options.get('dataset') or {
+                model._meta.model_name: model.objects.count() for model in (User, Group, Post, Follow)
+            },
+            'options': {key: options[key] for key in ('requests', 'warmup', 'seed')},
+            'results': results,
+        }
+
+    def targets(self, rng, options):
+        """Для каждой страницы — функция, которая делает один запрос к случайному, но воспроизводимому адресу."""
+        post_ids = list(Post.objects.order_by('pk').values_list('pk', flat=True)[:50000])
+        sample = rng.sample(post_ids, min(len(post_ids), 500))
+        posts = list(Post.objects.filter(pk__in=sample).select_related('author').order_by('pk'))
+        slugs = list(Group.objects.order_by('pk').values_list('slug', flat=True)[:1000]) or [None]
+        authors = [post.author.username for post in posts]
+        readers = list(User.objects.filter(
+            pk__in=Follow.objects.values('user')[:1000]
+        ).order_by('pk')[:50]) or list(User.objects.order_by('pk')[:1])
+        clients = []
+        for reader in readers:
+            client = Client()
+            client.force_login(reader)
+            clients.append(client)
+        anonymous = Client()
+
+        def page(number_range=3):
+            return {'page': rng.randint(1, number_range)}
+
+        return {
+            'index': lambda: anonymous.get('/', page()),
+            'group_posts': lambda: anonymous.get(f'/group/{rng.choice(slugs)}/', page()),
+            'profile': lambda: anonymous.get(f'/{rng.choice(authors)}/'),
+            'post_view': lambda: self.get_post(anonymous, rng.choice(posts)),
+            'follow_index': lambda: rng.choice(clients).get('/follow/', page()),
+            'add_comment': lambda: self.add_comment(rng.choice(clients), rng.choice(posts)),
+        }
+
+    @staticmethod
+    def get_post(client, post):
+        return client.get(f'/{post.author.username}/{post.pk}/')
+
+    @staticmethod
+    def add_comment(client, post):
+        return client.post(f'/{post.author.username}/{post.pk}/comment/', {'text': 'Комментарий из бенчмарка'})
+
+    def measure(self, request, options, cold):
+        for _ in range(options['warmup']):
+            request()
+        timings, queries = [], []
+        started_all = time.perf_counter()
+        for _ in range(options['requests']):
+            if cold:
+                cache.clear()
+            executed = []
+            with connection.execute_wrapper(lambda execute, *args: executed.append(1) or execute(*args)):
+                started = time.perf_counter()
+                response = request()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(executed))
+            if response.status_code >= 400:
+                raise RuntimeError(f'{response.status_code} на {response.request["PATH_INFO"]}')
+        elapsed = time.perf_counter() - started_all
+        timings.sort()
+        return {
+            'requests': len(timings),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'max_ms': round(timings[-1], 3),
+            'throughput_rps': round(len(timings) / elapsed, 1),
+            'queries_mean': round(statistics.mean(queries), 2),
+        }
+
+    def compare(self, report, path):
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        self.stderr.write(f'Сравнение с {baseline.get("commit") or path}:')
+        for view, modes in report['results'].items():
+            for mode, result in modes.items():
+                before = baseline.get('results', {}).get(view, {}).get(mode)
+                if not before:
+                    continue
+                change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+                self.stderr.write(
+                    f'{view:>13} {mode:>4}: p95 {before["p95_ms"]:.1f} → {result["p95_ms"]:.1f} мс ({change:+.0f}%)'
+                )
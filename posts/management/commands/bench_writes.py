@@ -0,0 +1,108 @@
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+
+from posts import writes
+from posts.models import Comment, Follow, Post, User
+
+
+def percentile(timings, share):
+    return timings[max(int(len(timings) * share) - 1, 0)] if timings else 0
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает базу одновременными записями (комментарии, подписки и отписки) и чтением '
+        'главной ленты из нескольких потоков: каждая запись своей транзакцией и через очередь '
+        'posts.writes. Созданные пользователи и их записи удаляются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--operations', type=int, default=100, help='Операций на каждый поток.')
+        parser.add_argument('--modes', nargs='+', default=['direct', 'queue'], choices=['direct', 'queue'])
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        User.objects.bulk_create(User(username=f'bench_writer_{i}') for i in range(options['writers']))
+        writers = list(User.objects.filter(username__startswith='bench_writer_').order_by('id'))
+        post = Post.objects.order_by('-pk').first() or Post.objects.create(text='Запись для нагрузки', author=writers[0])
+        try:
+            self.stdout.write(
+                f'{"режим":>7} {"записей/с":>10} {"чтений/с":>9} {"запись p50":>11} '
+                f'{"запись p95":>11} {"чтение p95":>11} {"ошибок":>7}'
+            )
+            for mode in options['modes']:
+                with override_settings(WRITE_BATCH_ASYNC=mode == 'queue'):
+                    row = self.run_mode(post, writers, options)
+                self.stdout.write(
+                    f'{mode:>7} {row["writes"]:>10.0f} {row["reads"]:>9.0f} {row["write_p50"]:>9.2f}мс '
+                    f'{row["write_p95"]:>9.2f}мс {row["read_p95"]:>9.2f}мс {row["errors"]:>7}'
+                )
+        finally:
+            User.objects.filter(pk__in=[writer.pk for writer in writers]).delete()
+
+    def run_mode(self, post, writers, options):
+        write_timings, read_timings, errors = [], [], []
+        authors = [post.author] + writers
+
+        def write(writer, rng):
+            for i in range(options['operations']):
+                author = rng.choice(authors)
+                if author == writer or rng.random() < 0.5:
+                    operation = Comment(post=post, author=writer, text=f'Комментарий {i}').save
+                elif rng.random() < 0.5:
+                    operation = lambda: Follow.objects.get_or_create(user=writer, author=author)  # noqa: E731
+                else:
+                    operation = Follow.objects.filter(user=writer, author=author).delete
+                self.timed(lambda: writes.submit(operation), write_timings, errors)
+
+        def read():
+            for _ in range(options['operations']):
+                self.timed(lambda: list(Post.objects.for_feed()[:settings.POSTS_PER_PAGE]), read_timings, errors)
+
+        threads = [
+            threading.Thread(target=self.in_thread, args=(write, writer, random.Random(options['seed'] + i)))
+            for i, writer in enumerate(writers)
+        ]
+        threads += [threading.Thread(target=self.in_thread, args=(read,)) for _ in range(options['readers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        write_timings.sort()
+        read_timings.sort()
+        return {
+            'writes': len(write_timings) / elapsed,
+            'reads': len(read_timings) / elapsed,
+            'write_p50': statistics.median(write_timings) if write_timings else 0,
+            'write_p95': percentile(write_timings, 0.95),
+            'read_p95': percentile(read_timings, 0.95),
+            'errors': len(errors),
+        }
+
+    @staticmethod
+    def in_thread(target, *args):
+        try:
+            target(*args)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def timed(operation, timings, errors):
+        started = time.perf_counter()
+        try:
+            operation()
+        except OperationalError as error:
+            errors.append(error)
+            return
+        timings.append((time.perf_counter() - started) * 1000)
@@ -0,0 +1,47 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.images import derivatives_key, invalidate_image_pages, render_derivatives
+from posts.models import Post
+
+
+def build(name, force):
+    storage = Post._meta.get_field('image').storage
+    try:
+        return name, render_derivatives(name, storage, force=force), None
+    except Exception as error:
+        return name, None, str(error)
+
+
+class Command(BaseCommand):
+    help = 'Создаёт недостающие уменьшенные копии изображений записей в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--force', action='store_true', help='Пересоздать уже существующие копии.')
+
+    def handle(self, *args, **options):
+        names = list(
+            Post.objects.exclude(image='').exclude(image__isnull=True).order_by().values_list(
+                'image', flat=True
+            ).distinct()
+        )
+        # Дочерние процессы не должны унаследовать открытые соединения с базой.
+        connections.close_all()
+        built = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            results = executor.map(build, names, [options['force']] * len(names), chunksize=16)
+            for name, sources, error in results:
+                if error is not None:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                cache.set(derivatives_key(name), sources, None)
+                # Закэшированные страницы с этой картинкой выводят её ещё без srcset.
+                invalidate_image_pages(name)
+                built += 1
+        self.stdout.write(self.style.SUCCESS(f'Готово: {built}, с ошибками: {failed}'))
@@ -0,0 +1,66 @@
+import os
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import delete as delete_with_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from posts.images import derivative_name, derivatives_key, thumbnail_key
+from posts.models import Post
+
+
+def walk(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name)
+    for directory in directories:
+        yield from walk(storage, os.path.join(path, directory))
+
+
+class Command(BaseCommand):
+    help = 'Удаляет файлы изображений, на которые не ссылается ни одна запись, вместе с их миниатюрами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Не трогать файлы моложе стольких секунд: их запись могла ещё не сохраниться.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет удалено.')
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        references = Counter(
+            Post.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True)
+        )
+        if not storage.exists(field.upload_to):
+            self.stdout.write('Изображений нет.')
+            return
+        deadline = time.time() - options['min_age']
+        files = removed = freed = 0
+        for name in walk(storage, field.upload_to.rstrip('/')):
+            files += 1
+            if references[name] or storage.get_modified_time(name).timestamp() > deadline:
+                continue
+            removed += 1
+            freed += storage.size(name)
+            self.stdout.write(f'Удаляется {name}')
+            if not options['dry_run']:
+                self.delete(name, storage)
+        shared = sum(1 for count in references.values() if count > 1)
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов: {files}, ссылок: {sum(references.values())}, общих для нескольких записей: {shared}. '
+            f'Удалено: {removed}, освобождено {freed / 1024 / 1024:.1f} МБ'
+        ))
+
+    def delete(self, name, storage):
+        # Вместе с исходником sorl удаляет его миниатюры и записи о них в хранилище ключей.
+        delete_with_thumbnails(ImageFile(name, storage))
+        directory = os.path.dirname(derivative_name(name, 0, ''))
+        if default_storage.exists(directory):
+            for derivative in walk(default_storage, directory):
+                default_storage.delete(derivative)
+        cache.delete_many([thumbnail_key(name), derivatives_key(name)])
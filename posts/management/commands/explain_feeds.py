@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Post, TimelineEntry
+
+
+def feed_queries(user_id, author_id, group_id, post_id):
+    """Горячие запросы лент и индексы, которые они должны использовать."""
+    now = timezone.now()
+    return (
+        ('index', Post.objects.for_feed()[:10], 'post_pub_date_idx'),
+        ('index, курсор', Post.objects.for_feed().filter(pub_date__lt=now)[:10], 'post_pub_date_idx'),
+        ('group_posts', Post.objects.filter(group_id=group_id).for_feed()[:10], 'post_group_pub_date_idx'),
+        ('profile', Post.objects.filter(author_id=author_id).for_feed()[:10], 'post_author_pub_date_idx'),
+        ('follow_index, лента', TimelineEntry.objects.filter(user_id=user_id).order_by(
+            '-pub_date', '-post_id').values_list('pub_date', 'post_id')[:10], 'timeline_user_pub_date_idx'),
+        ('follow_index, популярные авторы', Post.objects.filter(author_id=author_id).order_by(
+            '-pub_date', '-id').values_list('pub_date', 'id')[:10], 'post_author_pub_date_idx'),
+        ('post_view, комментарии', Comment.objects.filter(post_id=post_id).select_related('author'),
+         'comment_post_created_idx'),
+        ('подписчики автора', Follow.objects.filter(author_id=author_id).values_list('user_id', flat=True),
+         'follow_author_user_idx'),
+        ('подписка', Follow.objects.filter(user_id=user_id, author_id=author_id),
+         ('unique_follow', f'sqlite_autoindex_{Follow._meta.db_table}')),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Показывает планы запросов лент и проверяет, что они используют составные индексы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=1)
+        parser.add_argument('--author', type=int, default=1)
+        parser.add_argument('--group', type=int, default=1)
+        parser.add_argument('--post', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка планов поддерживается только для SQLite.')
+        failed = []
+        for label, queryset, indexes in feed_queries(
+            options['user'], options['author'], options['group'], options['post']
+        ):
+            if isinstance(indexes, str):
+                indexes = (indexes,)
+            plan = queryset.explain()
+            uses_index = any(index in plan for index in indexes)
+            status = self.style.SUCCESS('OK') if uses_index else self.style.ERROR('НЕТ ИНДЕКСА')
+            self.stdout.write(f'{label}: {indexes[0]} — {status}')
+            for line in plan.splitlines():
+                self.stdout.write(f'    {line}')
+            if not uses_index:
+                failed.append(label)
+        if failed:
+            raise CommandError(f'Запросы без ожидаемых индексов: {", ".join(failed)}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Post
+from posts.search import is_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс записей.'
+
+    def handle(self, *args, **options):
+        if not is_available():
+            raise CommandError('Полнотекстовый индекс доступен только для SQLite.')
+        count = rebuild_index(Post.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано записей: {count}'))
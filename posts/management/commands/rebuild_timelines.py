@@ -0,0 +1,41 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import User
+from posts.timelines import DatabaseTimelineBackend, get_timeline_backend
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает домашние ленты подписчиков из таблицы подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trim-only', action='store_true',
+            help='Только обрезать ленты до TIMELINE_MAX_LENGTH записей.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько лент пересобирать в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_timeline_backend()
+        users = User.objects.filter(follower__isnull=False).distinct()
+        count = 0
+        users = users.iterator()
+        # Пачками в одной транзакции: иначе каждое удаление и вставка фиксируются на диске отдельно.
+        while True:
+            batch = list(islice(users, options['batch_size']))
+            if not batch:
+                break
+            with transaction.atomic():
+                if options['trim_only']:
+                    if isinstance(backend, DatabaseTimelineBackend):
+                        backend.trim(*(user.pk for user in batch))
+                else:
+                    for user in batch:
+                        backend.rebuild(user)
+            count += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Обработано лент: {count}'))
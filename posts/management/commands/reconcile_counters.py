@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posts.cache import bump_generations
+from posts.counters import recount_comments, recount_users
+from posts.models import Group, Post, User
+
+
+def batches(queryset, size):
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), size):
+        yield queryset.filter(pk__in=ids[start:start + size])
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики записей, комментариев и подписок с данными и исправляет расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        size = options['batch_size']
+        users, posts = [], []
+        for batch in batches(User.objects.all(), size):
+            users += recount_users(batch)
+        for batch in batches(Post.objects.all(), size):
+            posts += recount_comments(batch)
+        if users or posts:
+            # Исправленные значения должны сразу попасть на закэшированные страницы.
+            usernames = User.objects.filter(Q(pk__in=users) | Q(posts__pk__in=posts)).values_list(
+                'username', flat=True
+            ).distinct()
+            slugs = Group.objects.filter(posts__pk__in=posts).values_list('slug', flat=True).distinct()
+            bump_generations(
+                'index', *(f'profile:{username}' for username in usernames), *(f'group:{slug}' for slug in slugs)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков пользователей: {len(users)}, записей: {len(posts)}'
+        ))
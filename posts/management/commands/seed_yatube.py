@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.seeding import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, записями, комментариями '
+        'и подписками в объёмах продакшена: популярность авторов распределена по Ципфу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--groups', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=2000000)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--exponent', type=float, default=1.1, help='Показатель распределения Ципфа.')
+        parser.add_argument('--days', type=int, default=365, help='За сколько дней распределить записи.')
+        parser.add_argument('--batch-size', type=int, default=50000)
+        parser.add_argument('--prefix', default='seed', help='Префикс имён пользователей и slug групп.')
+        parser.add_argument('--seed', type=int, default=0, help='Зерно генератора: одинаковые данные от запуска к запуску.')
+        parser.add_argument(
+            '--keep-indexes', action='store_true',
+            help='Не снимать вторичные индексы на время загрузки.',
+        )
+        parser.add_argument('--no-timelines', action='store_true', help='Не собирать домашние ленты.')
+        parser.add_argument('--no-search-index', action='store_true', help='Не заполнять поисковый индекс.')
+
+    def handle(self, *args, **options):
+        started = last = time.perf_counter()
+
+        def log(step):
+            nonlocal last
+            now = time.perf_counter()
+            self.stderr.write(f'[{now - started:7.1f} с, +{now - last:.1f} с] {step}')
+            last = now
+
+        created = seed(
+            users=options['users'], groups=options['groups'], posts=options['posts'],
+            comments=options['comments'], follows_per_user=options['follows_per_user'],
+            exponent=options['exponent'], days=options['days'], batch_size=options['batch_size'],
+            prefix=options['prefix'], random_seed=options['seed'],
+            defer_indexes=not options['keep_indexes'], timelines=not options['no_timelines'],
+            search_index=not options['no_search_index'], log=log,
+        )
+        log('готово')
+        elapsed = time.perf_counter() - started
+        total = sum(created.values())
+        for model_name, count in created.items():
+            self.stdout.write(f'{model_name}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано строк: {total} за {elapsed:.1f} с ({total / elapsed:.0f} строк/с)'
+        ))
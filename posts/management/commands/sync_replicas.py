@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from yatube.routers import copy_to_replica
+
+
+class Command(BaseCommand):
+    help = 'Перезаписывает SQLite-реплики из DATABASE_REPLICAS копией основной базы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='Какие реплики обновить; по умолчанию все.')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError('Реплики не настроены: перечислите пути к ним в YATUBE_REPLICAS.')
+        for alias in aliases:
+            if alias not in settings.DATABASE_REPLICAS:
+                raise CommandError(f'{alias!r} нет в DATABASE_REPLICAS')
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias!r} не SQLite: такие реплики обновляет сама СУБД')
+            started = time.perf_counter()
+            copy_to_replica(alias)
+            self.stdout.write(self.style.SUCCESS(
+                f'{alias}: обновлена за {(time.perf_counter() - started) * 1000:.0f} мс'
+            ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+
+from yatube.template_cache import is_cached, warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует все шаблоны проекта и приложений в кэш загрузчика и проверяет их синтаксис. '
+        'Кэш живёт в памяти процесса, поэтому в отдельном запуске команда только проверяет шаблоны; '
+        'сервер прогревает свой кэш при старте в wsgi.py.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        names, errors = warm_templates()
+        elapsed = time.perf_counter() - started
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)} из {len(names)}')
+        if not is_cached(engines['django'].engine):
+            self.stdout.write(self.style.WARNING(
+                'Кэширующий загрузчик выключен (DEBUG = True): шаблоны проверены, но не закэшированы.'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'Скомпилировано шаблонов: {len(names)} за {elapsed * 1000:.0f} мс'))
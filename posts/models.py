@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -13,16 +15,42 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты с авторами и группами одним запросом."""
+        return self.select_related('author', 'group').order_by('-pub_date', '-id')
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст', help_text='Введите текст')
     pub_date = models.DateTimeField('date published', auto_now_add=True)
+    updated = models.DateTimeField('date updated', auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts', null=True)
     group = models.ForeignKey(Group, on_delete=models.SET_NULL, blank=True, null=True,
                               related_name='posts', verbose_name='Группа', help_text='Выберите группу')
-    image = models.ImageField(upload_to='posts/', blank=True, null=True, verbose_name='Изображение')
+    image = models.ImageField(upload_to='posts/', storage=ContentAddressedStorage(),
+                              blank=True, null=True, verbose_name='Изображение')
+    comments_count = models.IntegerField('число комментариев', default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['author', '-pub_date', '-id'], name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'], name='post_group_pub_date_idx'),
+            models.Index(fields=['-pub_date', '-id'], name='post_pub_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # comments_count меняют только F()-обновления сигналов; сохранение загруженной раньше
+        # записи (например, при редактировании) не должно затирать их устаревшим значением.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comments_count'
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         short_text = self.text[:10]
@@ -37,9 +65,38 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(fields=['post', '-created'], name='comment_post_created_idx'),
+            models.Index(fields=['-created', '-id'], name='comment_created_idx'),
+        ]
 
 
 class Follow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="follower")
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="following")
-    unique_together = ('user', 'author')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'], name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')), name='prevent_self_follow'),
+        ]
+        indexes = [models.Index(fields=['author', 'user'], name='follow_author_user_idx')]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ('-pub_date', '-post')
+        unique_together = ('user', 'post')
+        indexes = [models.Index(fields=['user', '-pub_date', '-post'], name='timeline_user_pub_date_idx')]
+
+
+class UserCounters(models.Model):
+    """Счётчики пользователя, которые сигналы поддерживают атомарными F()-обновлениями."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='counters')
+    posts = models.IntegerField('записей', default=0)
+    followers = models.IntegerField('подписчиков', default=0)
+    following = models.IntegerField('подписок', default=0)
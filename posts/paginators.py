@@ -0,0 +1,188 @@
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+
+
+def encode_token(value):
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    try:
+        return base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def encode_cursor(obj):
+    """Курсор записи: её (pub_date, id) в URL-безопасном base64."""
+    return encode_token(f'{obj.pub_date.isoformat()}|{obj.pk}')
+
+
+def decode_cursor(token):
+    value = decode_token(token)
+    try:
+        pub_date, pk = value.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (AttributeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CursorPage(Sequence):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator:
+    """Постраничная навигация по ключу (pub_date, id) без COUNT(*) и OFFSET."""
+    is_cursor = True
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def get_page(self, before=None, after=None):
+        before = decode_cursor(before) if before else None
+        after = decode_cursor(after) if after else None
+        if before is not None:
+            pub_date, pk = before
+            queryset = self.object_list.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            ).order_by('-pub_date', '-pk')
+            items = list(queryset[:self.per_page + 1])
+            has_next = len(items) > self.per_page
+            return CursorPage(items[:self.per_page], self, has_next, True)
+        if after is not None:
+            pub_date, pk = after
+            queryset = self.object_list.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+            ).order_by('pub_date', 'pk')
+            items = list(queryset[:self.per_page + 1])
+            has_previous = len(items) > self.per_page
+            items = items[:self.per_page][::-1]
+            return CursorPage(items, self, True, has_previous)
+        queryset = self.object_list.order_by('-pub_date', '-pk')
+        items = list(queryset[:self.per_page + 1])
+        has_next = len(items) > self.per_page
+        return CursorPage(items[:self.per_page], self, has_next, False)
+
+
+def parse_page_number(value):
+    """Номер страницы из запроса; некорректный — первая страница, а не последняя, как у Paginator.get_page."""
+    try:
+        return max(int(value or 1), 1)
+    except ValueError:
+        return 1
+
+
+def paginate(request, object_list, per_page, numbered_pages, count=None):
+    """Номерные страницы для первых `numbered_pages` страниц, дальше — курсор.
+
+    Номер дальше `numbered_pages` — это глубокий OFFSET, поэтому такие страницы
+    не отдаются: листать дальше можно по курсору со страницы `numbered_pages`.
+    Известное заранее число объектов (`count`) избавляет от COUNT(*); без него
+    строки считаются только до конца последней номерной страницы и ещё одной.
+    """
+    before = request.GET.get('before')
+    after = request.GET.get('after')
+    if before or after:
+        paginator = CursorPaginator(object_list, per_page)
+        return paginator.get_page(before=before, after=after), paginator
+    number = parse_page_number(request.GET.get('page'))
+    if number > numbered_pages:
+        raise Http404(f'Номерные страницы заканчиваются на {numbered_pages}: дальше листайте по ссылке «Следующая»')
+    paginator = Paginator(object_list, per_page)
+    if count is None:
+        count = object_list[:numbered_pages * per_page + 1].count()
+    paginator.count = count
+    page = paginator.get_page(number)
+    page.numbered_range = range(1, min(paginator.num_pages, numbered_pages) + 1)
+    page.next_cursor = None
+    if page.number >= numbered_pages and page.has_next():
+        page.next_cursor = encode_cursor(page[-1])
+    return page, paginator
+
+
+def estimate_count(queryset):
+    """Оценка числа строк таблицы без COUNT(*); None, если СУБД её не даёт."""
+    table = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+            row = cursor.fetchone()
+            return row[0] if row else None
+        if connection.vendor != 'sqlite':
+            return None
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone() is not None:
+            # Статистика ANALYZE: первое число в stat любого индекса таблицы — число её строк.
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            row = cursor.fetchone()
+            if row is not None:
+                return int(row[0].split()[0])
+        # Без статистики наибольший rowid — оценка сверху, которая находится по ключу сразу.
+        cursor.execute(f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}')
+        return cursor.fetchone()[0] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для больших таблиц: без точного COUNT(*) по всей таблице.
+
+    Без фильтров берётся оценка СУБД (если она не меньше `exact_limit`),
+    с фильтрами строки считаются не дальше `exact_limit`.
+    """
+    exact_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate >= self.exact_limit:
+                return estimate
+        return queryset.order_by()[:self.exact_limit].count()
@@ -0,0 +1,221 @@
+"""Полнотекстовый поиск по записям на SQLite FTS5.
+
+В индекс попадают не слова, а их основы (упрощённый стеммер Snowball для
+русского языка), поэтому «котов» находит и «кот», и «коты». Запросы
+разбираются так же, а результаты упорядочены по bm25.
+"""
+import re
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .paginators import CursorPage, CursorPaginator, decode_token, encode_token
+
+FTS_TABLE = 'posts_post_fts'
+
+VOWELS = 'аеиоуыэюя'
+PERFECTIVE_GERUND = (('в', 'вши', 'вшись'), ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'))
+ADJECTIVE = ((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+    'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = (('ем', 'нн', 'вш', 'ющ', 'щ'), ('ивш', 'ывш', 'ующ'))
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен',
+     'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = ((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей', 'ой', 'ий',
+    'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю',
+    'ия', 'ья', 'я',
+))
+SUPERLATIVE = ((), ('ейше', 'ейш'))
+DERIVATIONAL = ((), ('ость', 'ост'))
+
+# Окончания каждой группы от длинных к коротким, с признаком «только после а/я».
+ENDINGS = {
+    groups: sorted(
+        [(ending, True) for ending in groups[0]] + [(ending, False) for ending in groups[1]],
+        key=lambda item: len(item[0]), reverse=True,
+    )
+    for groups in (PERFECTIVE_GERUND, ADJECTIVE, PARTICIPLE, REFLEXIVE, VERB, NOUN, SUPERLATIVE, DERIVATIONAL)
+}
+
+
+def regions(word):
+    """Начала областей RV и R2 алгоритма Snowball."""
+    rv = r1 = r2 = len(word)
+    for i, letter in enumerate(word):
+        if letter in VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+def strip_ending(word, start, groups):
+    """Отрезает самое длинное окончание из `groups`, лежащее целиком после `start`.
+
+    Окончания первой группы отрезаются, только если перед ними стоит «а» или «я».
+    Возвращает None, если подходящего окончания нет.
+    """
+    for ending, after_a in ENDINGS[groups]:
+        cut = len(word) - len(ending)
+        if not word.endswith(ending) or cut < start:
+            continue
+        if not after_a or (cut - 1 >= start and word[cut - 1] in 'ая'):
+            return word[:cut]
+        return None
+    return None
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = regions(word)
+    stemmed = strip_ending(word, rv, PERFECTIVE_GERUND)
+    if stemmed is None:
+        word = strip_ending(word, rv, REFLEXIVE) or word
+        stemmed = strip_ending(word, rv, ADJECTIVE)
+        if stemmed is not None:
+            stemmed = strip_ending(stemmed, rv, PARTICIPLE) or stemmed
+        else:
+            stemmed = strip_ending(word, rv, VERB) or strip_ending(word, rv, NOUN) or word
+    word = stemmed
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = strip_ending(word, r2, DERIVATIONAL) or word
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        return word[:-1]
+    superlative = strip_ending(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        return superlative[:-1] if superlative.endswith('нн') else superlative
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    return [stem(word) for word in re.findall(r'\w+', text.lower())]
+
+
+def match_expression(query):
+    """Безопасное выражение MATCH: все основы запроса в кавычках через AND."""
+    stems = dict.fromkeys(tokenize(query))
+    return ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in stems)
+
+
+def filter_matching(queryset, query):
+    """Сужает queryset записей до подходящих под запрос подзапросом к индексу."""
+    condition = RawSQL(
+        f'{Post._meta.db_table}.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)',
+        [match_expression(query) or '""'],
+        output_field=BooleanField(),
+    )
+    return queryset.annotate(search_match=condition).filter(search_match=True)
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def index_post(post):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)', [post.pk, ' '.join(tokenize(post.text))]
+        )
+
+
+def unindex_post(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild_index(posts):
+    """Заполняет индекс заново; возвращает число проиндексированных записей."""
+    rows = ((pk, ' '.join(tokenize(text))) for pk, text in posts.order_by().values_list('pk', 'text').iterator())
+    count = 0
+    # Одна транзакция: иначе каждая вставка фиксируется на диске отдельно.
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        while True:
+            batch = list(islice(rows, 1000))
+            if not batch:
+                return count
+            cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)', batch)
+            count += len(batch)
+
+
+def encode_search_cursor(rank, pk):
+    return encode_token(f'{rank!r}|{pk}')
+
+
+def decode_search_cursor(token):
+    value = decode_token(token)
+    try:
+        rank, pk = value.split('|')
+        return float(rank), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+class SearchPage(CursorPage):
+    def __init__(self, object_list, ranks, has_next, has_previous):
+        super().__init__(object_list, None, has_next, has_previous)
+        self.ranks = ranks
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_search_cursor(self.ranks[-1], self.object_list[-1].pk)
+        return None
+
+
+def search_posts(query, per_page, cursor=None):
+    """Страница найденных записей, от самых релевантных; продолжение — по курсору (bm25, id).
+
+    Без FTS5 (не SQLite) ищется подстрока, от новых записей к старым.
+    """
+    if not is_available():
+        paginator = CursorPaginator(Post.objects.for_feed().filter(text__icontains=query), per_page)
+        return paginator.get_page(before=cursor)
+    expression = match_expression(query)
+    if not expression:
+        return SearchPage([], [], False, False)
+    position = decode_search_cursor(cursor) if cursor else None
+    sql = (
+        f'SELECT rowid, score FROM (SELECT rowid, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s)'
+    )
+    params = [expression]
+    if position is not None:
+        sql += ' WHERE score > %s OR (score = %s AND rowid > %s)'
+        params += [position[0], position[0], position[1]]
+    sql += ' ORDER BY score, rowid LIMIT %s'
+    params.append(per_page + 1)
+    with connection.cursor() as db:
+        db.execute(sql, params)
+        rows = db.fetchall()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = Post.objects.for_feed().in_bulk([pk for pk, rank in rows])
+    found = [(posts[pk], rank) for pk, rank in rows if pk in posts]
+    return SearchPage(
+        [post for post, rank in found], [rank for post, rank in found], has_next, position is not None
+    )
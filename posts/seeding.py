@@ -0,0 +1,290 @@
+"""Синтетические данные: пользователи, группы, записи, комментарии и подписки.
+
+Число записей у авторов и подписчиков у них распределено по Ципфу, как в
+живых соцсетях: немного популярных авторов и длинный хвост. Пользователи и
+группы создаются через bulk_create, а записи, комментарии и подписки —
+готовыми кортежами через executemany: на миллионах строк создание объектов
+моделей обходится дороже самой вставки. Счётчики, число комментариев и
+поисковый индекс считаются при генерации, ленты — одним запросом в конце.
+"""
+import heapq
+import random
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Comment, Follow, Group, Post, TimelineEntry, User, UserCounters
+from .search import FTS_TABLE, is_available, stem
+from .timelines import DatabaseTimelineBackend, get_timeline_backend
+
+WORDS = (
+    'день утро вечер город лес река море солнце дождь снег кот собака книга музыка фильм друг семья '
+    'работа дом дорога поезд путешествие кофе чай обед прогулка парк школа лето зима весна осень '
+    'новый старый большой маленький красивый быстрый тихий яркий добрый интересный смешной сегодня '
+    'вчера завтра снова очень читать писать думать смотреть гулять любить видеть слушать'
+).split()
+STEMS = {word: stem(word) for word in WORDS}
+
+
+def zipf_cum_weights(count, exponent):
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def random_words(rng, low=5, high=40):
+    return rng.choices(WORDS, k=rng.randint(low, high))
+
+
+def random_text(rng, low=5, high=40):
+    return ' '.join(random_words(rng, low, high)).capitalize() + '.'
+
+
+def batched_create(model, objects, batch_size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def insert_rows(model, fields, rows, batch_size):
+    """Вставляет кортежи значений полей `fields` пачками; возвращает число строк."""
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+    sql = (
+        f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+        f'VALUES ({", ".join(["%s"] * len(fields))})'
+    )
+    rows = iter(rows)
+    count = 0
+    with connection.cursor() as cursor:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return count
+            cursor.executemany(sql, batch)
+            count += len(batch)
+
+
+def last_pk(model):
+    return model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def secondary_indexes(model):
+    """Имена и определения неуникальных индексов таблицы, которые можно снять и построить заново."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s "
+                "AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%'", [table]
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s "
+                "AND indexdef NOT LIKE 'CREATE UNIQUE%%' "
+                "AND indexname NOT IN (SELECT conname FROM pg_constraint)", [table]
+            )
+        else:
+            return []
+        return cursor.fetchall()
+
+
+@contextmanager
+def deferred_indexes(*models):
+    """Снимает вторичные индексы на время загрузки: один раз построить быстрее, чем поддерживать."""
+    indexes = [index for model in models for index in secondary_indexes(model)]
+    with connection.cursor() as cursor:
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+            if connection.vendor == 'sqlite':
+                # Статистика для планировщика по выборке строк, а не по всей таблице.
+                cursor.execute('PRAGMA analysis_limit = 1000')
+                for model in models:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+
+@contextmanager
+def bulk_load():
+    """На SQLite на время загрузки отключает fsync и проверку внешних ключей, увеличивает кэш страниц.
+
+    Ключи проверять незачем: все ссылки берутся из только что вставленных строк.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous, = cursor.fetchone()
+        cursor.execute('PRAGMA cache_size')
+        cache_size, = cursor.fetchone()
+        cursor.execute('PRAGMA synchronous = OFF')
+        cursor.execute('PRAGMA cache_size = -262144')
+    checking_disabled = connection.disable_constraint_checking()
+    try:
+        yield
+    finally:
+        if checking_disabled:
+            connection.enable_constraint_checking()
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {int(synchronous)}')
+            cursor.execute(f'PRAGMA cache_size = {int(cache_size)}')
+
+
+def timeline_rows(max_length, authors, subscriptions, followers, pub_date):
+    """Строки лент (подписчик, номер записи, дата): k-way слияние записей авторов, известных после генерации.
+
+    Так быстрее, чем rebuild_timelines: не нужно сортировать соединение подписок
+    со всеми записями авторов, а записи популярных авторов в ленты не попадают вовсе.
+    """
+    posts_by_author = defaultdict(list)
+    for i, author in enumerate(authors):
+        posts_by_author[author].append(i)
+    pulled = {author for author, count in followers.items() if count > settings.TIMELINE_FANOUT_THRESHOLD}
+    dates = {}
+    for user_id, followed in subscriptions.items():
+        sources = [reversed(posts_by_author[author][-max_length:]) for author in followed - pulled]
+        for i in islice(heapq.merge(*sources, reverse=True), max_length):
+            if i not in dates:
+                dates[i] = pub_date(i)
+            yield user_id, i, dates[i]
+
+
+def seed(users=1000, groups=20, posts=20000, comments=20000, follows_per_user=20, exponent=1.1,
+         days=365, batch_size=5000, prefix='seed', random_seed=0, defer_indexes=False,
+         timelines=True, search_index=True, log=None):
+    """Заполняет базу и возвращает число созданных строк по моделям."""
+    rng = random.Random(random_seed)
+    log = log or (lambda message: None)
+    adapt = connection.ops.adapt_datetimefield_value
+    now = timezone.now()
+    start = now - timedelta(days=days)
+    step = (now - start) / max(posts, 1)
+    # Новые строки отличаем от прежних по первичному ключу: он растёт.
+    watermarks = {model: last_pk(model) for model in (User, Group, Post, Comment, Follow)}
+    first_post = watermarks[Post] + 1
+    search_index = search_index and is_available()
+
+    def created(model):
+        return model.objects.filter(pk__gt=watermarks[model])
+
+    def deferred(*models):
+        return deferred_indexes(*models) if defer_indexes else nullcontext()
+
+    with bulk_load(), transaction.atomic():
+        log('пользователи')
+        batched_create(User, (
+            User(username=f'{prefix}_{i}', password='!', date_joined=start) for i in range(users)
+        ), batch_size)
+        user_ids = list(created(User).order_by('pk').values_list('pk', flat=True))
+
+        log('группы')
+        batched_create(Group, (
+            Group(title=f'Группа {i}', slug=f'{prefix}-group-{i}', description=random_text(rng))
+            for i in range(groups)
+        ), batch_size)
+        group_ids = list(created(Group).order_by('pk').values_list('pk', flat=True))
+
+        # Популярные авторы пишут больше и собирают больше подписчиков.
+        author_weights = zipf_cum_weights(len(user_ids), exponent)
+        authors = rng.choices(user_ids, cum_weights=author_weights, k=posts) if user_ids else []
+        # Свежие записи обсуждают чаще: ранг 0 — самая новая запись.
+        ranks = []
+        if authors:
+            ranks = rng.choices(range(posts), cum_weights=zipf_cum_weights(posts, exponent), k=comments)
+        comments_count = [0] * len(authors)
+        for rank in ranks:
+            comments_count[posts - 1 - rank] += 1
+
+        with deferred(Post, Comment, Follow):
+            log('записи')
+            if search_index:
+                # Строки индекса удалённых записей с теми же id не должны мешать вставке.
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid >= %s', [first_post])
+            post_fields = ('id', 'text', 'author', 'group', 'pub_date', 'updated', 'image', 'comments_count')
+            for chunk in range(0, len(authors), batch_size):
+                rows, documents = [], []
+                for i in range(chunk, min(chunk + batch_size, len(authors))):
+                    words = random_words(rng)
+                    pub_date = adapt(start + step * i)
+                    group = rng.choice(group_ids) if group_ids and rng.random() < 0.5 else None
+                    rows.append((
+                        first_post + i, ' '.join(words).capitalize() + '.', authors[i], group,
+                        pub_date, pub_date, '', comments_count[i],
+                    ))
+                    documents.append((first_post + i, ' '.join(STEMS[word] for word in words)))
+                insert_rows(Post, post_fields, rows, batch_size)
+                if search_index:
+                    # Основы слов известны заранее: индексируем без повторного разбора текста.
+                    with connection.cursor() as cursor:
+                        cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)', documents)
+
+            log('комментарии')
+            insert_rows(Comment, ('post', 'author', 'text', 'created'), (
+                (
+                    first_post + posts - 1 - rank, rng.choice(user_ids), random_text(rng, 2, 15),
+                    adapt(start + step * (posts - 1 - rank) + timedelta(minutes=rng.randint(1, 600))),
+                )
+                for rank in ranks
+            ), batch_size)
+
+            log('подписки')
+            followers, subscriptions = dict.fromkeys(user_ids, 0), {}
+
+            def make_follows():
+                for user_id in user_ids:
+                    followed = set(rng.choices(user_ids, cum_weights=author_weights, k=follows_per_user))
+                    followed.discard(user_id)
+                    subscriptions[user_id] = followed
+                    for author_id in followed:
+                        followers[author_id] += 1
+                        yield user_id, author_id
+            insert_rows(Follow, ('user', 'author'), make_follows(), batch_size)
+            log('индексы')
+
+        log('счётчики')
+        posts_total = dict.fromkeys(user_ids, 0)
+        for author in authors:
+            posts_total[author] += 1
+        insert_rows(UserCounters, ('user', 'posts', 'followers', 'following'), (
+            (user_id, posts_total[user_id], followers[user_id], len(subscriptions[user_id])) for user_id in user_ids
+        ), batch_size)
+
+        timeline_entries = 0
+        backend = get_timeline_backend()
+        if timelines and isinstance(backend, DatabaseTimelineBackend):
+            log('ленты')
+            with deferred(TimelineEntry):
+                timeline_entries = insert_rows(TimelineEntry, ('user', 'post', 'pub_date'), (
+                    (user_id, first_post + i, pub_date) for user_id, i, pub_date in timeline_rows(
+                        backend.max_length, authors, subscriptions, followers, lambda i: adapt(start + step * i),
+                    )
+                ), batch_size)
+                log('индексы лент')
+
+        # Записи вставлены с явными id: последовательности (PostgreSQL) нужно сдвинуть.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Post]):
+                cursor.execute(sql)
+
+    # Закэшированные страницы ничего не знают о новых строках.
+    cache.clear()
+    counts = {model._meta.model_name: created(model).count() for model in watermarks}
+    counts[TimelineEntry._meta.model_name] = timeline_entries
+    return counts
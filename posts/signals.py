@@ -0,0 +1,148 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .cache import bump_generations
+from .counters import change_user_counters
+from .models import Comment, Follow, Group, Post, User, UserCounters
+from .search import index_post, unindex_post
+from .timelines import follower_ids, get_timeline_backend, is_pull_author
+
+
+@receiver(post_save, sender=Post)
+def push_to_timelines(sender, instance, created, **kwargs):
+    if created and instance.author_id is not None and not is_pull_author(instance.author_id):
+        get_timeline_backend().push(instance, list(follower_ids(instance.author_id)))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created and not is_pull_author(instance.author_id):
+        backend = get_timeline_backend()
+        posts = instance.author.posts.order_by('-pub_date', '-id').only('id', 'pub_date')
+        backend.backfill(instance.user, posts[:backend.max_length])
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    get_timeline_backend().prune(instance.user, instance.author)
+
+
+@receiver(post_save, sender=User)
+def create_user_counters(sender, instance, created, **kwargs):
+    if created:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+# Счётчики обновляются раньше сброса кэша, чтобы пересобранные страницы видели новые значения.
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def count_posts(sender, instance, created=False, **kwargs):
+    if created or kwargs['signal'] is post_delete:
+        change_user_counters(instance.author_id, posts=1 if created else -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def count_comments(sender, instance, created=False, **kwargs):
+    if instance.post_id is not None and (created or kwargs['signal'] is post_delete):
+        Post.objects.filter(pk=instance.post_id).update(comments_count=F('comments_count') + (1 if created else -1))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def count_follows(sender, instance, created=False, **kwargs):
+    if created or kwargs['signal'] is post_delete:
+        delta = 1 if created else -1
+        change_user_counters(instance.author_id, followers=delta)
+        change_user_counters(instance.user_id, following=delta)
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, **kwargs):
+    index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_post(instance.pk)
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # Через __dict__, чтобы не догружать group_id у записей из .only(...) отдельным запросом.
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+def post_scopes(post):
+    group_ids = {post.group_id, getattr(post, '_loaded_group_id', None)} - {None}
+    scopes = ['index', f'post:{post.pk}']
+    scopes += [f'group:{slug}' for slug in Group.objects.filter(pk__in=group_ids).values_list('slug', flat=True)]
+    if post.author_id is not None:
+        scopes.append(f'profile:{post.author.username}')
+    return scopes
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    bump_generations(*post_scopes(instance))
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    if instance.post_id is not None:
+        bump_generations(*post_scopes(instance.post))
+
+
+def card_scopes(posts):
+    """Области страниц, на которых показаны карточки `posts`."""
+    scopes = {'index'}
+    for post_id, username, slug in posts.values_list('id', 'author__username', 'group__slug'):
+        scopes.update((f'post:{post_id}', f'profile:{username}'))
+        if slug:
+            scopes.add(f'group:{slug}')
+    return scopes
+
+
+@receiver(post_init, sender=Group)
+def remember_slug(sender, instance, **kwargs):
+    instance._loaded_slug = instance.__dict__.get('slug')
+
+
+# Название и адрес группы есть в карточках её записей на всех лентах, а не только на странице группы.
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    scopes = {f'group:{slug}' for slug in (instance.slug, instance._loaded_slug) if slug}
+    if kwargs['signal'] is post_save:
+        scopes |= card_scopes(Post.objects.filter(group=instance))
+    bump_generations('index', *scopes)
+    instance._loaded_slug = instance.slug
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+# Имя автора — в ссылках его карточек, имя комментатора — на страницах записей с его комментариями.
+@receiver(post_save, sender=User)
+def invalidate_renamed_user_pages(sender, instance, created, **kwargs):
+    old = instance._loaded_username
+    if not created and old and old != instance.username:
+        commented = Post.objects.filter(comments__author=instance).values_list('id', flat=True)
+        bump_generations(
+            f'profile:{old}', f'profile:{instance.username}',
+            *card_scopes(Post.objects.filter(author=instance)), *(f'post:{post_id}' for post_id in commented),
+        )
+    instance._loaded_username = instance.username
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, **kwargs):
+    bump_generations(f'profile:{instance.user.username}', f'profile:{instance.author.username}')
+
@@ -0,0 +1,37 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под sha256 содержимого, разложенными по каталогам `ab/cd/`.
+
+    Одинаковые загрузки сохраняются один раз и получают одно имя, поэтому
+    записи с одной картинкой делят и её миниатюры. Файлы никогда не
+    перезаписываются: имя однозначно задаёт содержимое.
+    """
+
+    def content_name(self, name, content):
+        digest = getattr(content, 'sha256', None)
+        if digest is None:
+            sha256 = hashlib.sha256()
+            for chunk in content.chunks():
+                sha256.update(chunk)
+            digest = sha256.hexdigest()
+            content.seek(0)
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest[2:4], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        name = self.content_name(name, content)
+        if self.exists(name):
+            return name
+        saved = super().save(name, content, max_length=max_length)
+        if saved != name:
+            # Такой же файл успел сохранить параллельный запрос: копия не нужна.
+            self.delete(saved)
+        return name
@@ -0,0 +1,10 @@
+from django import template
+
+from posts.images import picture
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_picture(image):
+    return picture(image)
@@ -0,0 +1,233 @@
+import bisect
+import heapq
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import OuterRef, Subquery
+from django.utils.module_loading import import_string
+
+from .models import Follow, Post, TimelineEntry, UserCounters
+from .paginators import encode_cursor, parse_page_number
+
+
+class BaseTimelineBackend:
+    """Хранилище домашних лент: для каждого подписчика — (pub_date, post_id), новые первыми."""
+
+    def __init__(self, max_length):
+        self.max_length = max_length
+
+    def push(self, post, user_ids):
+        raise NotImplementedError
+
+    def backfill(self, user, posts):
+        raise NotImplementedError
+
+    def prune(self, user, author):
+        raise NotImplementedError
+
+    def clear(self, user):
+        raise NotImplementedError
+
+    def entries(self, user):
+        raise NotImplementedError
+
+    def recent_posts(self, user):
+        return Post.objects.filter(author__following__user=user).exclude(
+            author__in=pull_author_ids(user)
+        ).order_by('-pub_date', '-id').only('id', 'pub_date')[:self.max_length]
+
+    def rebuild(self, user):
+        self.clear(user)
+        self.backfill(user, self.recent_posts(user))
+
+
+class DatabaseTimelineBackend(BaseTimelineBackend):
+    def push(self, post, user_ids):
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        self.trim(*user_ids)
+
+    def backfill(self, user, posts):
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user=user, post_id=post.pk, pub_date=post.pub_date) for post in posts],
+            ignore_conflicts=True,
+        )
+        self.trim(user.pk)
+
+    def prune(self, user, author):
+        TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+    def clear(self, user):
+        TimelineEntry.objects.filter(user=user).delete()
+
+    def trim(self, *user_ids):
+        """Одним DELETE удаляет у лент `user_ids` записи старше max_length-й."""
+        oldest_kept = TimelineEntry.objects.filter(user_id=OuterRef('user_id')).order_by(
+            '-pub_date', '-post_id'
+        ).values('pub_date')[self.max_length - 1:self.max_length]
+        TimelineEntry.objects.filter(user_id__in=user_ids, pub_date__lt=Subquery(oldest_kept)).delete()
+
+    def entries(self, user):
+        return TimelineEntry.objects.filter(user=user).order_by(
+            '-pub_date', '-post_id'
+        ).values_list('pub_date', 'post_id')[:self.max_length]
+
+
+class CacheTimelineBackend(BaseTimelineBackend):
+    """Ленты в кэше; вытесненная лента собирается заново из подписок при чтении.
+
+    Каждое чтение-изменение-запись ленты идёт под блокировкой её ключа через
+    cache.add, чтобы одновременные записи и подписки не затирали друг друга.
+    """
+    key_prefix = 'timeline'
+    lock_timeout = 5
+
+    def make_key(self, user_id):
+        return f'{self.key_prefix}:{user_id}'
+
+    @contextmanager
+    def locked(self, key):
+        """Блокировка ленты; если её не дождаться за lock_timeout, возвращает False."""
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        while not cache.add(lock_key, 1, self.lock_timeout):
+            if time.monotonic() > deadline:
+                yield False
+                return
+            time.sleep(0.005)
+        try:
+            yield True
+        finally:
+            cache.delete(lock_key)
+
+    def update(self, key, change):
+        """Меняет ленту под блокировкой; отсутствующую в кэше не трогает."""
+        with self.locked(key) as acquired:
+            if not acquired:
+                # Лента сбрасывается и соберётся заново из подписок: так изменение не потеряется.
+                cache.delete(key)
+                return
+            timeline = cache.get(key)
+            if timeline is not None:
+                cache.set(key, change(timeline), timeout=None)
+
+    def push(self, post, user_ids):
+        keys = [self.make_key(user_id) for user_id in user_ids]
+        # Ленту, которую сейчас собирают из базы (её ключ заблокирован), тоже обновляем после сборки.
+        present = cache.get_many(keys + [f'{key}:lock' for key in keys])
+        entry = (post.pub_date, post.pk)
+        for key in keys:
+            if key in present or f'{key}:lock' in present:
+                self.update(key, lambda timeline: self.insert(timeline, entry))
+
+    def insert(self, timeline, entry):
+        """Вставляет запись на её место по (pub_date, post_id): записи приходят не по порядку."""
+        ascending = [item for item in reversed(timeline) if item != entry]
+        bisect.insort(ascending, entry)
+        return ascending[-self.max_length:][::-1]
+
+    def backfill(self, user, posts):
+        added = {(post.pub_date, post.pk) for post in posts}
+        self.update(
+            self.make_key(user.pk),
+            lambda timeline: sorted(set(timeline) | added, reverse=True)[:self.max_length],
+        )
+
+    def prune(self, user, author):
+        def remove_author(timeline):
+            removed = set(
+                author.posts.filter(id__in=[post_id for _, post_id in timeline]).values_list('id', flat=True)
+            )
+            return [entry for entry in timeline if entry[1] not in removed]
+
+        self.update(self.make_key(user.pk), remove_author)
+
+    def clear(self, user):
+        cache.delete(self.make_key(user.pk))
+
+    def entries(self, user):
+        key = self.make_key(user.pk)
+        timeline = cache.get(key)
+        if timeline is None:
+            with self.locked(key) as acquired:
+                timeline = cache.get(key)
+                if timeline is None:
+                    timeline = [(post.pub_date, post.pk) for post in self.recent_posts(user)]
+                    if acquired:
+                        cache.set(key, timeline, timeout=None)
+        return timeline
+
+
+def get_timeline_backend():
+    backend_class = import_string(settings.TIMELINE_BACKEND)
+    return backend_class(max_length=settings.TIMELINE_MAX_LENGTH)
+
+
+def follower_ids(author_id):
+    return Follow.objects.filter(author_id=author_id).values_list('user_id', flat=True)
+
+
+def is_pull_author(author_id):
+    """Авторов с большим числом подписчиков не раскладываем по лентам, а читаем при запросе.
+
+    Число подписчиков берётся из UserCounters, а не считается по posts_follow.
+    """
+    return UserCounters.objects.filter(pk=author_id, followers__gt=settings.TIMELINE_FANOUT_THRESHOLD).exists()
+
+
+def pull_author_ids(user):
+    return list(
+        Follow.objects.filter(
+            user=user, author__counters__followers__gt=settings.TIMELINE_FANOUT_THRESHOLD
+        ).values_list('author_id', flat=True)
+    )
+
+
+def merge_entries(sources, limit):
+    """k-way слияние отсортированных по убыванию (pub_date, post_id) источников без повторов."""
+    seen = set()
+    merged = (
+        entry for entry in heapq.merge(*sources, reverse=True)
+        if entry[1] not in seen and not seen.add(entry[1])
+    )
+    return list(islice(merged, limit))
+
+
+def home_entries(user, backend, limit=None):
+    """Записи ленты; с `limit` из каждого источника берётся не больше `limit` первых."""
+    limit = min(limit or backend.max_length, backend.max_length)
+    entries = backend.entries(user)
+    author_ids = pull_author_ids(user)
+    if not author_ids:
+        return entries
+    pulled = [
+        Post.objects.filter(author_id=author_id).order_by(
+            '-pub_date', '-id'
+        ).values_list('pub_date', 'id')[:limit]
+        for author_id in author_ids
+    ]
+    return merge_entries([entries[:limit], *pulled], limit)
+
+
+def timeline_page(user, page_number, per_page):
+    """Страница домашней ленты: материализованные записи плюс записи популярных авторов."""
+    backend = get_timeline_backend()
+    number = parse_page_number(page_number)
+    # На запись больше, чем нужно до конца страницы: по ней видно, есть ли следующая.
+    entries = home_entries(user, backend, number * per_page + 1)
+    paginator = Paginator(entries, per_page)
+    page = paginator.get_page(number)
+    post_ids = [post_id for _, post_id in page.object_list]
+    posts = Post.objects.for_feed().in_bulk(post_ids)
+    page.object_list = [posts[post_id] for post_id in post_ids if post_id in posts]
+    page.numbered_range = range(1, min(paginator.num_pages, settings.POSTS_NUMBERED_PAGES) + 1)
+    page.next_cursor = None
+    if not page.has_next() and page.object_list and paginator.count >= backend.max_length:
+        page.next_cursor = encode_cursor(page.object_list[-1])
+    return page, paginator
@@ -0,0 +1,37 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+
+
+def oversized_uploads(request):
+    """Имена полей, файлы которых HashingUploadHandler отбросил как слишком большие."""
+    return getattr(request, 'oversized_uploads', frozenset())
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку по частям сразу во временный файл и считает sha256 на лету.
+
+    Файл никогда не собирается в памяти целиком. Как только он перерастает
+    IMAGE_UPLOAD_MAX_SIZE, загрузка файла прерывается (SkipFile): остаток
+    не пишется и не хэшируется, а имя поля запоминается в
+    request.oversized_uploads, чтобы форма сообщила настоящую причину.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.IMAGE_UPLOAD_MAX_SIZE:
+            if self.request is not None:
+                self.request.oversized_uploads = oversized_uploads(self.request) | {self.field_name}
+            raise SkipFile
+        self.sha256.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.sha256.hexdigest()
+        return uploaded
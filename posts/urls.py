@@ -7,6 +7,7 @@ urlpatterns = [
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
     path('new/', views.post_new, name='new_post'),
+    path('search/', views.search, name='search'),
     path('', views.index, name='index'),
     path('<str:username>/', views.profile, name='profile'),
     path(
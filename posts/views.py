@@ -1,18 +1,30 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from yatube.routers import pin_to_primary, read_from_replica
+
+from . import writes
+from .cache import cache_versioned
+from .counters import get_user_counters
 from .forms import CommentForm, PostForm
+from .images import schedule_thumbnail
 from .models import Comment, Follow, Group, Post, User
+from .paginators import paginate
+from .search import search_posts
+from .timelines import timeline_page
+from .uploadhandlers import oversized_uploads
+
 
+def paginate_posts(request, post_list, count=None):
+    return paginate(request, post_list, settings.POSTS_PER_PAGE, settings.POSTS_NUMBERED_PAGES, count)
 
-@cache_page(20, key_prefix="index_page")
+
+@read_from_replica
+@cache_versioned(lambda request: ['index'], key_prefix='index_page')
 def index(request):
-    post_list = Post.objects.order_by('-pub_date').all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    page, paginator = paginate_posts(request, post_list)
     return render(
         request,
         'index.html',
@@ -20,12 +32,12 @@ def index(request):
     )
 
 
+@read_from_replica
+@cache_versioned(lambda request, slug: [f'group:{slug}'], key_prefix='group_page')
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.order_by('-pub_date').all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = group.posts.for_feed()
+    page, paginator = paginate_posts(request, post_list)
     return render(
         request,
         'group.html',
@@ -33,29 +45,39 @@ def group_posts(request, slug):
     )
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page = search_posts(query, settings.POSTS_PER_PAGE, request.GET.get('cursor')) if query else None
+    return render(request, 'search.html', {'query': query, 'page': page})
+
+
 @login_required
 def post_new(request):
-    form = PostForm(request.POST, files=request.FILES or None)
+    form = PostForm(request.POST, files=request.FILES or None, oversized=oversized_uploads(request))
     if request.method != 'POST':
         return render(request, 'post_new.html', {'form': form})
     if form.is_valid():
         post_new = form.save(commit=False)
         post_new.author = request.user
         post_new.save()
+        schedule_thumbnail(post_new.image)
+        pin_to_primary(request)
         return redirect('index')
     return render(request, 'post_new.html', {'form': form})
 
 
+@read_from_replica
+@cache_versioned(lambda request, username: [f'profile:{username}'], key_prefix='profile_page')
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts_count = Post.objects.filter(author=author).count()
-    post = Post.objects.filter(author=author)
-    paginator = Paginator(post, 10)
-    page = paginator.get_page(request.GET.get('page'))
+    author = get_object_or_404(User.objects.select_related('counters'), username=username)
+    counters = get_user_counters(author)
+    post = author.posts.for_feed()
+    page, paginator = paginate_posts(request, post, counters.posts)
     return render(request, 'profile.html', {
         'page': page,
         'paginator': paginator,
-        'posts_count': posts_count,
+        'posts_count': counters.posts,
+        'counters': counters,
         'author': author
     })
 
@@ -64,22 +86,32 @@ def profile(request, username):
 def post_edit(request, username, post_id):
     author = User.objects.get(username=username)
     post = get_object_or_404(Post, pk=post_id, author__username=username)
-    form = PostForm(request.POST or None, files=request.FILES or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post, oversized=oversized_uploads(request)
+    )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data:
+            schedule_thumbnail(post.image)
+        pin_to_primary(request)
         return redirect('post', username=author, post_id=post_id)
     return render(request, 'post_new.html', {'form': form, 'author': author, 'post': post})
 
 
+@read_from_replica
+@cache_versioned(
+    lambda request, username, post_id: [f'post:{post_id}', f'profile:{username}'], key_prefix='post_page', store=False
+)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    post_list = post.author.posts.all()
-    length = post_list.count()
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.for_feed().select_related('author__counters'), id=post_id, author__username=username
+    )
+    counters = get_user_counters(post.author)
+    comments = post.comments.select_related('author')
     form = CommentForm()
     user = request.user
     context = {'author': post.author, 'post': post,
-               'length': length, 'items': comments,
+               'length': counters.posts, 'counters': counters, 'items': comments,
                'form': form, 'user': user}
     return render(request, 'post.html', context)
 
@@ -95,9 +127,9 @@ def page_not_found(request, exception):
 
 @login_required
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.select_related('author'), id=post_id)
     user = request.user
-    items = post.comments.all()
+    items = post.comments.select_related('author')
     if request.method != 'POST':
         form = CommentForm()
         return render(request, 'comments.html', {'form': form, 'post': post, 'user': user, 'items': items})
@@ -106,21 +138,24 @@ def add_comment(request, username, post_id):
         comment_new = form.save(commit=False)
         comment_new.post = post
         comment_new.author = request.user
-        comment_new.save()
+        writes.submit(comment_new.save)
+        pin_to_primary(request)
         return redirect('post', username=username, post_id=post_id)
     return render(request, 'comments.html', {'form': form, 'post': post, 'user': user, 'items': items})
 
 
+@read_from_replica
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    if request.GET.get('before') or request.GET.get('after'):
+        posts = Post.objects.filter(author__following__user=request.user).for_feed()
+        page, paginator = paginate_posts(request, posts)
+    else:
+        page, paginator = timeline_page(request.user, request.GET.get('page'), settings.POSTS_PER_PAGE)
     context = {
         'page': page,
         'paginator': paginator,
-        'page_number': page_number
+        'page_number': request.GET.get('page')
     }
     return render(request, "follow.html", context)
 
@@ -130,7 +165,7 @@ def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
     if user != author:
-        follow = Follow.objects.get_or_create(user=user, author=author)
+        writes.submit(lambda: Follow.objects.get_or_create(user=user, author=author))
     return redirect('profile', username=username)
 
 
@@ -139,7 +174,7 @@ def profile_unfollow(request, username):
     user = request.user
     author = User.objects.get(username=username)
     follow = Follow.objects.filter(user=user, author=author)
-    follow.delete()
+    writes.submit(follow.delete)
     return redirect('profile', username=username)
 
 
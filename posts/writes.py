@@ -0,0 +1,95 @@
+"""Очередь мелких записей.
+
+SQLite пропускает одного писателя за раз. Когда комментарии и подписки из
+разных запросов пишут сами, каждая запись — отдельная транзакция с fsync,
+и потоки стоят в очереди за блокировкой. Вместо этого они ставят запись
+в общую очередь процесса и ждут результат, а один поток выполняет
+накопившиеся записи короткими транзакциями до WRITE_BATCH_SIZE штук.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+from django.db import connection, transaction
+
+_queue = None
+_queue_pid = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Очередь текущего процесса; поток записи стартует при первом обращении и после fork."""
+    global _queue, _queue_pid
+    with _queue_lock:
+        if _queue_pid != os.getpid():
+            _queue = queue.Queue()
+            _queue_pid = os.getpid()
+            threading.Thread(target=drain, args=(_queue,), name='writes', daemon=True).start()
+        return _queue
+
+
+def submit(function):
+    """Выполняет `function()` в очереди записи и возвращает её результат или поднимает её исключение.
+
+    Внутри transaction.atomic() вызывающего запись выполняется сразу в его транзакции:
+    поток очереди не видит её незакоммиченных данных.
+    """
+    if not settings.WRITE_BATCH_ASYNC or connection.in_atomic_block:
+        with transaction.atomic():
+            return function()
+    future = Future()
+    get_queue().put((function, future))
+    try:
+        return future.result(timeout=settings.WRITE_BATCH_TIMEOUT)
+    except TimeoutError:
+        # Ещё не взятая в пачку запись снимается; уже выполняемая может закоммититься.
+        future.cancel()
+        raise
+
+
+def drain(requests):
+    while True:
+        batch = [requests.get()]
+        deadline = time.monotonic() + settings.WRITE_BATCH_DELAY
+        while len(batch) < settings.WRITE_BATCH_SIZE:
+            try:
+                batch.append(requests.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        try:
+            write_batch(batch)
+        except Exception as error:
+            # Поток очереди не должен умереть: иначе все следующие submit ждали бы вечно.
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+
+def write_batch(batch):
+    """Одна транзакция на пачку; ошибка одной записи откатывает только её точку сохранения.
+
+    Результаты отдаются после коммита, чтобы следующий запрос автора уже видел запись.
+    """
+    batch = [(function, future) for function, future in batch if future.set_running_or_notify_cancel()]
+    if not batch:
+        return
+    outcomes = []
+    try:
+        with transaction.atomic():
+            for function, _ in batch:
+                try:
+                    with transaction.atomic():
+                        outcomes.append((True, function()))
+                except Exception as error:
+                    outcomes.append((False, error))
+    except Exception as error:
+        outcomes = [(False, error)] * len(batch)
+    for (_, future), (succeeded, result) in zip(batch, outcomes):
+        if succeeded:
+            future.set_result(result)
+        else:
+            future.set_exception(result)
+    connection.close_if_unusable_or_obsolete()
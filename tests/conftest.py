@@ -1,4 +1,36 @@
+from copy import deepcopy
+
+import pytest
+from django.conf import settings
+from django.test.utils import override_settings
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
+    'tests.fixtures.fixture_queries',
 ]
+
+
+@pytest.fixture(autouse=True, scope='session')
+def test_cache(tmp_path_factory):
+    """Кэш тестов во временном каталоге: тесты очищают его перед каждым, и кэш разработчика в cache/ не трогается."""
+    caches = deepcopy(settings.CACHES)
+    caches['default']['LOCATION'] = str(tmp_path_factory.mktemp('cache') / 'cache.sqlite3')
+    with override_settings(CACHES=caches):
+        yield
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_teardown(item):
+    """Дожидается фоновых миниатюр до очистки базы: иначе воркер держит таблицы заблокированными."""
+    from posts import images
+    with images._executor_lock:
+        executor, images._executor = images._executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(test_cache):
+    from django.core.cache import cache
+    cache.clear()
@@ -0,0 +1,102 @@
+import difflib
+import re
+from collections import Counter
+from contextlib import ContextDecorator
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Потолки SQL-запросов на страницу; от размера страницы число запросов зависеть не должно.
+QUERY_BUDGETS = {
+    'index': 4,
+    'group_posts': 5,
+    'profile': 4,
+    'post': 4,
+    'follow_index': 6,
+    'add_comment': 6,
+    'search': 4,
+}
+
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize(sql):
+    """SQL без литералов: запросы, различающиеся только параметрами, совпадают."""
+    return LITERAL.sub('?', sql)
+
+
+def statements(queries):
+    return [normalize(query['sql']) for query in queries]
+
+
+def report(label, limit, queries, baseline=None):
+    lines = [f'{label}: {len(queries)} SQL-запросов при бюджете {limit}']
+    if baseline is not None:
+        lines.append(f'Разница с эталоном ({len(baseline)} запросов):')
+        lines += difflib.unified_diff(statements(baseline), statements(queries), 'эталон', 'сейчас', lineterm='')
+    else:
+        repeats = Counter(statements(queries))
+        lines += [
+            f'{"!" if repeats[sql] > 1 else " "} {number:>3}. {sql}'
+            for number, sql in enumerate(statements(queries), 1)
+        ]
+        lines += [f'Повторяется {count} раз (возможен N+1): {sql}' for sql, count in repeats.items() if count > 1]
+    return '\n'.join(lines)
+
+
+class QueryBudget(ContextDecorator):
+    """Не больше `limit` SQL-запросов внутри блока или теста.
+
+    При превышении тест падает с перечнем запросов, а если задан эталон —
+    с разницей между его запросами и пойманными.
+    """
+
+    def __init__(self, limit, label='', baseline=None):
+        self.limit = limit
+        self.label = label
+        self.baseline = baseline
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connection)
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self.context) > self.limit:
+            pytest.fail(report(self.label, self.limit, self.context.captured_queries, self.baseline), pytrace=False)
+
+
+def query_budget(view_or_limit, label=''):
+    """Бюджет по имени страницы из QUERY_BUDGETS или числом; работает и как декоратор теста."""
+    if isinstance(view_or_limit, str):
+        return QueryBudget(QUERY_BUDGETS[view_or_limit], label or view_or_limit)
+    return QueryBudget(view_or_limit, label)
+
+
+@pytest.fixture
+def assert_query_budget():
+    return query_budget
+
+
+@pytest.fixture
+def assert_page_size_queries(settings):
+    """Проверяет, что страница укладывается в бюджет и не делает больше запросов на большей странице."""
+
+    def check(view, get, page_sizes=(1, 10)):
+        baseline = None
+        for page_size in page_sizes:
+            settings.POSTS_PER_PAGE = page_size
+            cache.clear()
+            label = f'{view} ({page_size} на странице)'
+            with QueryBudget(QUERY_BUDGETS[view], label, baseline) as queries:
+                response = get()
+            assert response.status_code == 200, f'Страница {label} работает неправильно'
+            if baseline is not None and len(queries) != len(baseline):
+                pytest.fail(report(label, len(baseline), queries.captured_queries, baseline), pytrace=False)
+            baseline = baseline or queries.captured_queries
+        return response
+
+    return check
@@ -0,0 +1,67 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Post
+from posts.paginators import EstimatedCountPaginator
+
+
+class TestAdminChangelists:
+
+    @pytest.fixture
+    def admin_client(self, client):
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        client.force_login(admin)
+        return client
+
+    @pytest.fixture
+    def posts(self, user, group):
+        posts = [Post.objects.create(text=f'Запись номер {i}', author=user, group=group) for i in range(5)]
+        for post in posts:
+            Comment.objects.create(post=post, author=user, text='Комментарий')
+        return posts
+
+    @pytest.mark.django_db
+    def test_changelists_query_count_does_not_grow(self, admin_client, posts, django_assert_max_num_queries):
+        for url in ('/admin/posts/post/', '/admin/posts/comment/'):
+            with django_assert_max_num_queries(8):
+                response = admin_client.get(url)
+            assert response.status_code == 200, f'Страница `{url}` работает неправильно'
+
+    @pytest.mark.django_db
+    def test_date_hierarchy_without_distinct_scan(self, admin_client, posts):
+        year = posts[0].pub_date.year
+        for params in ({}, {'pub_date__year': year}, {'pub_date__year': year, 'pub_date__month': 1}):
+            with CaptureQueriesContext(connection) as queries:
+                response = admin_client.get('/admin/posts/post/', params)
+            assert response.status_code == 200
+            assert not [query for query in queries if 'DISTINCT' in query['sql']], \
+                'Проверьте, что date_hierarchy не перебирает даты всех записей'
+        assert str(year) in response.content.decode()
+
+    @pytest.mark.django_db
+    def test_search_uses_full_text_index(self, admin_client, posts):
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get('/admin/posts/post/', {'q': 'номер'})
+        assert len(response.context['cl'].result_list) == 5
+        assert not [query for query in queries if 'LIKE' in query['sql']], \
+            'Проверьте, что поиск в админке не использует LIKE'
+        assert any('posts_post_fts' in query['sql'] for query in queries)
+
+    @pytest.mark.django_db
+    def test_estimated_count(self, posts):
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+        assert paginator.count == 5, 'Проверьте, что небольшие таблицы считаются точно'
+        EstimatedCountPaginator.exact_limit, limit = 3, EstimatedCountPaginator.exact_limit
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            with CaptureQueriesContext(connection) as queries:
+                assert EstimatedCountPaginator(Post.objects.all(), 2).count == 5
+            assert not [query for query in queries if 'COUNT(' in query['sql']], \
+                'Проверьте, что для большой таблицы число строк берётся из статистики'
+            assert EstimatedCountPaginator(Post.objects.filter(text__startswith='Запись'), 2).count == 3, \
+                'Проверьте, что с фильтром строки считаются не дальше предела'
+        finally:
+            EstimatedCountPaginator.exact_limit = limit
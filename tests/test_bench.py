@@ -0,0 +1,81 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, F
+
+from posts.counters import recount_comments, recount_users
+from posts.models import Comment, Follow, Post, TimelineEntry, User, UserCounters
+from posts.search import search_posts
+from posts.seeding import secondary_indexes, seed
+from posts.timelines import get_timeline_backend
+
+
+class TestBenchmarks:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_seed(self):
+        created = seed(users=30, groups=3, posts=200, comments=100, follows_per_user=5, prefix='t')
+        assert created['user'] == 30 and created['post'] == 200 and created['comment'] == 100
+        assert Follow.objects.filter(user=F('author')).count() == 0, 'Проверьте, что нет подписок на себя'
+        counts = sorted(Post.objects.order_by().values('author').annotate(n=Count('pk')).values_list('n', flat=True))
+        assert counts[-1] > counts[len(counts) // 2] * 3, 'Проверьте, что число записей у авторов неравномерно'
+        assert UserCounters.objects.count() == 30, 'Проверьте, что счётчики пересчитаны после заполнения'
+        assert TimelineEntry.objects.exists(), 'Проверьте, что ленты собраны после заполнения'
+        assert sum(Post.objects.values_list('comments_count', flat=True)) == Comment.objects.count()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_seed_yatube(self):
+        indexes = {model: secondary_indexes(model) for model in (Post, Comment, Follow, TimelineEntry)}
+        out = StringIO()
+        call_command(
+            'seed_yatube', users=40, groups=3, posts=300, comments=200, follows_per_user=5, batch_size=50,
+            stdout=out, stderr=StringIO(),
+        )
+        assert 'Создано строк' in out.getvalue()
+        assert Post.objects.count() == 300 and Comment.objects.count() == 200
+        assert {model: secondary_indexes(model) for model in indexes} == indexes, \
+            'Проверьте, что снятые на время загрузки индексы построены заново'
+        assert recount_users(User.objects.all()) == [], 'Проверьте, что счётчики посчитаны при генерации'
+        assert recount_comments(Post.objects.all()) == [], 'Проверьте, что число комментариев посчитано при генерации'
+
+        backend = get_timeline_backend()
+        for user in User.objects.filter(follower__isnull=False).distinct()[:5]:
+            assert list(backend.entries(user)) == [
+                (post.pub_date, post.pk) for post in backend.recent_posts(user)
+            ], 'Проверьте, что ленты совпадают с собранными rebuild_timelines'
+        if connection.vendor == 'sqlite':
+            word = Post.objects.first().text.split()[1]
+            assert search_posts(word, 10).object_list, 'Проверьте, что записи попадают в поисковый индекс'
+
+        call_command('seed_yatube', users=5, posts=10, comments=5, prefix='more', stdout=StringIO(), stderr=StringIO())
+        assert Post.objects.count() == 310, 'Проверьте, что повторный запуск дополняет базу'
+        assert Post.objects.create(text='Запись', author=User.objects.first()).pk > 310, \
+            'Проверьте, что после вставки с явными id новые записи получают свободные id'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bench_views_json(self, tmp_path):
+        seed(users=20, groups=2, posts=100, comments=50, follows_per_user=5, prefix='t')
+        output = tmp_path / 'bench.json'
+        call_command(
+            'bench_views', use_existing=True, requests=3, warmup=1, output=str(output),
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        report = json.loads(output.read_text())
+        assert set(report['results']) == {
+            'index', 'group_posts', 'profile', 'post_view', 'follow_index', 'add_comment'
+        }
+        for view, modes in report['results'].items():
+            for mode in ('warm', 'cold'):
+                assert {'p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'} <= set(modes[mode]), \
+                    f'Проверьте, что для `{view}` сохраняются перцентили и пропускная способность'
+
+        errors = StringIO()
+        call_command(
+            'bench_views', use_existing=True, requests=3, warmup=0, views=['index'], compare=str(output),
+            stdout=StringIO(), stderr=errors,
+        )
+        assert 'p95' in errors.getvalue(), 'Проверьте, что прогон сравнивается с прошлым результатом'
+
@@ -0,0 +1,247 @@
+import threading
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+
+from posts.cache import bump_generations, cache_versioned, get_or_recompute, page_cache_key
+from posts.models import Comment, Group, Post
+
+
+class TestVersionedPageCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_index_invalidated_by_new_post(self, client, user):
+        Post.objects.create(text='Первый пост', author=user)
+        response = client.get('/')
+        assert 'Первый пост' in response.content.decode()
+
+        Post.objects.filter(text='Первый пост').update(text='Изменён в обход сигналов')
+        response = client.get('/')
+        assert 'Первый пост' in response.content.decode(), \
+            'Проверьте, что главная страница берётся из кэша, пока записи не менялись'
+
+        Post.objects.create(text='Второй пост', author=user)
+        response = client.get('/')
+        assert 'Второй пост' in response.content.decode(), \
+            'Проверьте, что новая запись сразу сбрасывает кэш главной страницы'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_comment_invalidates_feeds(self, client, user, post_with_group):
+        urls = ('/', f'/group/{post_with_group.group.slug}/', f'/{user.username}/')
+        for url in urls:
+            assert 'Добавить комментарий' in client.get(url).content.decode()
+        Comment.objects.create(post=post_with_group, author=user, text='Комментарий')
+        for url in urls:
+            assert '1 комментариев' in client.get(url).content.decode(), \
+                f'Проверьте, что комментарий сбрасывает кэш страницы `{url}`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_group_page_keeps_cache_for_other_groups(self, client, user, group, django_assert_max_num_queries):
+        other_group = Group.objects.create(title='Другая группа', slug='other', description='-')
+        Post.objects.create(text='Пост группы', author=user, group=group)
+        client.get(f'/group/{group.slug}/')
+        Post.objects.create(text='Пост другой группы', author=user, group=other_group)
+        with django_assert_max_num_queries(0):
+            client.get(f'/group/{group.slug}/')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_moving_post_invalidates_old_group(self, client, user, group):
+        other_group = Group.objects.create(title='Другая группа', slug='other', description='-')
+        post = Post.objects.create(text='Переезжающий пост', author=user, group=group)
+        assert 'Переезжающий пост' in client.get(f'/group/{group.slug}/').content.decode()
+        post = Post.objects.get(pk=post.pk)
+        post.group = other_group
+        post.save()
+        assert 'Переезжающий пост' not in client.get(f'/group/{group.slug}/').content.decode(), \
+            'Проверьте, что перенос записи сбрасывает кэш прежней группы'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pages_are_cached_per_user(self, user_client, user):
+        Post.objects.create(text='Пост', author=user)
+        assert 'Редактировать' in user_client.get('/').content.decode()
+        other_client = Client()
+        other_client.force_login(get_user_model().objects.create_user(username='Другой'))
+        assert 'Редактировать' not in other_client.get('/').content.decode(), \
+            'Проверьте, что кэш не отдаёт чужую страницу'
+
+
+class TestStampedeProtection:
+
+    def run_concurrently(self, func, threads=10):
+        barrier = threading.Barrier(threads)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(func())
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return results
+
+    def slow_builder(self, calls, value):
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return value
+        return build
+
+    def test_single_rebuild_on_cold_cache(self):
+        calls = []
+        build = self.slow_builder(calls, 'страница')
+        results = self.run_concurrently(lambda: get_or_recompute('stampede:cold', build, 60))
+        assert len(calls) == 1, 'Проверьте, что холодный кэш пересчитывает страницу один раз'
+        assert results == ['страница'] * 10
+
+    def test_stale_value_served_while_rebuilding(self):
+        get_or_recompute('stampede:stale', lambda: 'старая', 60, version=1)
+        calls = []
+        build = self.slow_builder(calls, 'новая')
+        results = self.run_concurrently(lambda: get_or_recompute('stampede:stale', build, 60, version=2))
+        assert len(calls) == 1, 'Проверьте, что устаревшую страницу пересчитывает один запрос'
+        assert results.count('новая') == 1 and results.count('старая') == 9, \
+            'Проверьте, что во время пересчёта остальные запросы получают прежнюю версию'
+
+    def test_early_expiration(self):
+        cache.set('stampede:early', ('старая', None, time.time() + 0.01, 10.0), 60)
+        assert get_or_recompute('stampede:early', lambda: 'новая', 60) == 'новая', \
+            'Проверьте, что долгая в расчёте запись пересчитывается до истечения срока'
+
+    def test_view_decorator(self):
+        calls = []
+
+        @cache_versioned(lambda request: ['stampede-view'], key_prefix='stampede_view')
+        def view(request):
+            calls.append(1)
+            time.sleep(0.2)
+            return HttpResponse('страница')
+
+        def get():
+            request = RequestFactory().get('/')
+            request.user = AnonymousUser()
+            return view(request).content
+
+        results = self.run_concurrently(get)
+        assert len(calls) == 1, 'Проверьте, что представление пересобирается один раз'
+        assert results == ['страница'.encode()] * 10
+
+
+class TestPostCardFragments:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_card_fragment_shared_between_feeds(self, client, user, post_with_group):
+        assert post_with_group.text in client.get('/').content.decode()
+        Post.objects.filter(pk=post_with_group.pk).update(text='Изменён в обход сигналов')
+        response = client.get(f'/group/{post_with_group.group.slug}/')
+        assert post_with_group.text in response.content.decode(), \
+            'Проверьте, что карточка записи берётся из общего кэша фрагментов'
+
+        post = Post.objects.get(pk=post_with_group.pk)
+        post.text = 'Отредактированный текст'
+        post.save()
+        response = client.get(f'/group/{post_with_group.group.slug}/')
+        assert 'Отредактированный текст' in response.content.decode(), \
+            'Проверьте, что редактирование записи сбрасывает кэш её карточки'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_edit_button_rendered_per_user(self, client, user_client, user, post_with_group):
+        assert 'Редактировать' in user_client.get(f'/{user.username}/{post_with_group.id}/').content.decode()
+        other_client = Client()
+        other_client.force_login(get_user_model().objects.create_user(username='Другой'))
+        response = other_client.get(f'/{user.username}/{post_with_group.id}/')
+        assert post_with_group.text in response.content.decode()
+        assert 'Редактировать' not in response.content.decode(), \
+            'Проверьте, что кнопка редактирования не попадает в общий фрагмент карточки'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_card_links_follow_renames(self, client, user, post_with_group):
+        group = post_with_group.group
+        for url in ('/', f'/group/{group.slug}/'):
+            client.get(url)
+        user.username = 'RenamedAuthor'
+        user.save()
+        for url in ('/', f'/group/{group.slug}/'):
+            assert f'/RenamedAuthor/{post_with_group.id}/' in client.get(url).content.decode(), \
+                f'Проверьте, что после переименования автора карточки на `{url}` ведут на новый адрес'
+
+        for url in ('/', '/RenamedAuthor/', f'/RenamedAuthor/{post_with_group.id}/'):
+            client.get(url)
+        group.slug = 'new-slug'
+        group.save()
+        for url in ('/', '/RenamedAuthor/', f'/RenamedAuthor/{post_with_group.id}/'):
+            assert '/group/new-slug/' in client.get(url).content.decode(), \
+                f'Проверьте, что после смены адреса группы карточки на `{url}` ведут на новый адрес'
+
+
+class TestConditionalGet:
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feeds_answer_not_modified(self, client, user, post_with_group, django_assert_max_num_queries):
+        urls = ('/', f'/group/{post_with_group.group.slug}/', f'/{user.username}/',
+                f'/{user.username}/{post_with_group.id}/')
+        responses = {url: client.get(url) for url in urls}
+        for url, response in responses.items():
+            assert response.status_code == 200 and response.has_header('ETag'), \
+                f'Проверьте, что страница `{url}` отдаёт ETag'
+            with django_assert_max_num_queries(0):
+                repeated = self.revalidate(client, url, response)
+            assert repeated.status_code == 304, f'Проверьте, что `{url}` отвечает 304, если ничего не менялось'
+            assert repeated['ETag'] == response['ETag']
+
+        Comment.objects.create(post=post_with_group, author=user, text='Новый комментарий')
+        for url, response in responses.items():
+            assert self.revalidate(client, url, response).status_code == 200, \
+                f'Проверьте, что после нового комментария `{url}` отдаётся заново'
+
+    def test_stale_page_keeps_its_etag(self):
+        body = ['старая']
+
+        @cache_versioned(lambda request: ['stale-etag'], key_prefix='stale_etag')
+        def view(request):
+            return HttpResponse(body[0])
+
+        def get(**headers):
+            request = RequestFactory().get('/', **headers)
+            request.user = AnonymousUser()
+            return view(request)
+
+        get()
+        body[0] = 'новая'
+        bump_generations('stale-etag')
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        lock_key = f'{page_cache_key("stale_etag", request)}:lock'
+        cache.add(lock_key, 1, 10)
+        try:
+            stale = get()
+        finally:
+            cache.delete(lock_key)
+        assert stale.content == 'старая'.encode(), 'Во время пересборки должна отдаваться прежняя версия'
+        fresh = get(HTTP_IF_NONE_MATCH=stale['ETag'])
+        assert fresh.status_code == 200 and fresh.content == 'новая'.encode(), \
+            'Проверьте, что устаревшая копия не получает ETag новой версии и не подтверждается ответом 304'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_etag_depends_on_user_and_scope(self, client, user_client, user, group, post):
+        anonymous = Client()
+        assert anonymous.get('/')['ETag'] != user_client.get('/')['ETag'], \
+            'Проверьте, что ETag различается для разных пользователей'
+        response = anonymous.get(f'/{user.username}/{post.id}/')
+        Post.objects.create(text='Пост в группе', author=get_user_model().objects.create_user(username='Other'),
+                            group=group)
+        assert self.revalidate(anonymous, f'/{user.username}/{post.id}/', response).status_code == 304, \
+            'Проверьте, что запись чужого автора не сбрасывает ETag страницы записи'
+        Post.objects.create(text='Ещё пост автора', author=user)
+        assert self.revalidate(anonymous, f'/{user.username}/{post.id}/', response).status_code == 200, \
+            'Проверьте, что изменения счётчиков автора сбрасывают ETag страницы записи'
@@ -77,7 +77,7 @@ class TestComment:
             assert False, 'Проверьте, что не авторизованного пользователя `/<username>/<post_id>/comment/` отправляете на страницу авторизации'
 
     @pytest.mark.django_db(transaction=True)
-    def test_comment_add_auth_view(self, user_client, post):
+    def test_comment_add_auth_view(self, user_client, post, assert_query_budget):
         try:
             response = user_client.get(f'/{post.author.username}/{post.id}/comment')
         except Exception as e:
@@ -89,8 +89,11 @@ class TestComment:
         assert response.status_code != 404, \
             'Страница `/<username>/<post_id>/comment/` не найдена, проверьте этот адрес в *urls.py*'
 
+        with assert_query_budget('add_comment'):
+            user_client.get(url)
         text = 'Новый коммент 94938!'
-        response = user_client.post(url, data={'text': text})
+        with assert_query_budget('add_comment'):
+            response = user_client.post(url, data={'text': text})
 
         assert response.status_code in (301, 302), \
             'Проверьте, что со страницы `/<username>/<post_id>/comment/` после создания комментария перенаправляете на страницу поста'
@@ -0,0 +1,82 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Follow, Post, UserCounters
+
+
+class TestCounters:
+
+    @pytest.fixture
+    def author(self):
+        return get_user_model().objects.create_user(username='CounterAuthor')
+
+    def counters(self, user):
+        return UserCounters.objects.get(user=user)
+
+    @pytest.mark.django_db
+    def test_counters_follow_changes(self, user, author):
+        post = Post.objects.create(text='Пост', author=author)
+        Post.objects.create(text='Ещё пост', author=author)
+        follow = Follow.objects.create(user=user, author=author)
+        comment = Comment.objects.create(post=post, author=user, text='Комментарий')
+        counters = self.counters(author)
+        assert (counters.posts, counters.followers, counters.following) == (2, 1, 0), \
+            'Проверьте, что счётчики записей и подписчиков обновляются сигналами'
+        assert self.counters(user).following == 1, 'Проверьте, что обновляется счётчик подписок'
+        assert Post.objects.get(pk=post.pk).comments_count == 1, \
+            'Проверьте, что обновляется счётчик комментариев записи'
+
+        comment.delete()
+        follow.delete()
+        post.delete()
+        counters = self.counters(author)
+        assert (counters.posts, counters.followers) == (1, 0), 'Проверьте, что удаление уменьшает счётчики'
+        assert self.counters(user).following == 0
+        assert Post.objects.get().comments_count == 0
+
+    @pytest.mark.django_db
+    def test_edit_keeps_comments_count(self, user_client, user):
+        post = Post.objects.create(text='Пост', author=user)
+        loaded = Post.objects.get(pk=post.pk)
+        Comment.objects.create(post=post, author=user, text='Комментарий')
+        loaded.text = 'Отредактирован'
+        loaded.save()
+        assert Post.objects.get(pk=post.pk).comments_count == 1, \
+            'Проверьте, что сохранение записи не затирает счётчик комментариев'
+
+        user_client.post(f'/{user.username}/{post.id}/edit/', {'text': 'Через форму'})
+        post.refresh_from_db()
+        assert (post.text, post.comments_count) == ('Через форму', 1), \
+            'Проверьте, что редактирование записи не сбрасывает счётчик комментариев'
+
+    @pytest.mark.django_db
+    def test_pages_read_counters(self, client, user, author):
+        post = Post.objects.create(text='Пост', author=author)
+        Follow.objects.create(user=user, author=author)
+        for url in (f'/{author.username}/', f'/{author.username}/{post.id}/'):
+            with CaptureQueriesContext(connection) as queries:
+                content = client.get(url).content.decode()
+            assert 'Подписчиков: 1' in content and 'Записей: 1' in content, \
+                f'Проверьте, что на странице `{url}` выводятся счётчики автора'
+            assert not [query for query in queries if 'COUNT(' in query['sql']], \
+                f'Проверьте, что страница `{url}` не считает записи и подписки через COUNT(*)'
+
+    @pytest.mark.django_db
+    def test_reconcile_counters(self, user, author):
+        post = Post.objects.create(text='Пост', author=author)
+        Comment.objects.create(post=post, author=user, text='Комментарий')
+        UserCounters.objects.filter(user=author).update(posts=10, followers=-3)
+        UserCounters.objects.filter(user=user).delete()
+        Post.objects.filter(pk=post.pk).update(comments_count=5)
+
+        call_command('reconcile_counters', stdout=StringIO())
+        counters = self.counters(author)
+        assert (counters.posts, counters.followers, counters.following) == (1, 0, 0), \
+            'Проверьте, что reconcile_counters исправляет расхождения'
+        assert self.counters(user).posts == 0, 'Проверьте, что недостающие счётчики создаются'
+        assert Post.objects.get(pk=post.pk).comments_count == 1
@@ -1,11 +1,14 @@
 import re
 import tempfile
+from contextlib import nullcontext
 
 import pytest
 from django.contrib.auth import get_user_model
 from django.core.paginator import Page, Paginator
 from django.db.models import fields
 
+from tests.fixtures.fixture_queries import query_budget
+
 try:
     from posts.models import Post
 except ImportError:
@@ -59,13 +62,14 @@ class TestFollow:
         # assert author_field.on_delete == CASCADE, \
         #     'Свойство `author` модели `Follow` должно иметь аттрибут `on_delete=models.CASCADE`'
 
-    def check_url(self, client, url, str_url):
-        try:
-            response = client.get(f'{url}')
-        except Exception as e:
-            assert False, f'''Страница `{str_url}` работает неправильно. Ошибка: `{e}`'''
-        if response.status_code in (301, 302) and response.url == f'{url}/':
-            response = client.get(f'{url}/')
+    def check_url(self, client, url, str_url, budget=None):
+        with query_budget(budget, str_url) if budget else nullcontext():
+            try:
+                response = client.get(f'{url}')
+            except Exception as e:
+                assert False, f'''Страница `{str_url}` работает неправильно. Ошибка: `{e}`'''
+            if response.status_code in (301, 302) and response.url == f'{url}/':
+                response = client.get(f'{url}/')
         assert response.status_code != 404, f'Страница `{str_url}` не найдена, проверьте этот адрес в *urls.py*'
         return response
 
@@ -108,7 +112,7 @@ class TestFollow:
         Post.objects.create(text='Тестовый пост 9789', author=user_2, image=image)
         Post.objects.create(text='Тестовый пост 4574', author=user_2, image=image)
 
-        response = self.check_url(user_client, f'/follow', '/follow/')
+        response = self.check_url(user_client, f'/follow', '/follow/', 'follow_index')
         assert 'paginator' in response.context, \
             'Проверьте, что передали переменную `paginator` в контекст страницы `/follow/`'
         assert type(response.context['paginator']) == Paginator, \
@@ -122,18 +126,29 @@ class TestFollow:
 
         self.check_url(user_client, f'/{user_2.username}/follow', '/<username>/follow/')
         assert user.follower.count() == 2, 'Проверьте, что вы можете подписаться на пользователя'
-        response = self.check_url(user_client, f'/follow', '/follow/')
+        response = self.check_url(user_client, f'/follow', '/follow/', 'follow_index')
         assert len(response.context['page']) == 5, \
             'Проверьте, что на странице `/follow/` список статей авторов на которых подписаны'
 
         self.check_url(user_client, f'/{user_1.username}/unfollow', '/<username>/unfollow/')
         assert user.follower.count() == 1, 'Проверьте, что вы можете отписаться от пользователя'
-        response = self.check_url(user_client, f'/follow', '/follow/')
+        response = self.check_url(user_client, f'/follow', '/follow/', 'follow_index')
         assert len(response.context['page']) == 3, \
             'Проверьте, что на странице `/follow/` список статей авторов на которых подписаны'
 
         self.check_url(user_client, f'/{user_2.username}/unfollow', '/<username>/unfollow/')
         assert user.follower.count() == 0, 'Проверьте, что вы можете отписаться от пользователя'
-        response = self.check_url(user_client, f'/follow', '/follow/')
+        response = self.check_url(user_client, f'/follow', '/follow/', 'follow_index')
         assert len(response.context['page']) == 0, \
             'Проверьте, что на странице `/follow/` список статей авторов на которых подписаны'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_unique(self, user):
+        from django.db import IntegrityError, transaction
+        author = get_user_model().objects.create_user(username='TestUser_unique')
+        Follow.objects.create(user=user, author=author)
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=user, author=author)
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=user, author=user)
+        assert user.follower.count() == 1, 'Проверьте, что подписка уникальна на уровне базы данных'
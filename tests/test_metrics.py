@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+
+from posts.models import Post
+from yatube.metrics import Histogram, MetricsMiddleware, registry
+
+
+class TestMetrics:
+
+    @pytest.fixture
+    def staff_client(self):
+        client = Client()
+        client.force_login(get_user_model().objects.create_user(username='staff', is_staff=True))
+        return client
+
+    @pytest.mark.django_db
+    def test_metrics_recorded_per_view(self, client, staff_client, user, post):
+        client.get('/')
+        client.get('/')
+        client.get(f'/{user.username}/{post.id}/')
+        response = staff_client.get('/metrics')
+        assert response.status_code == 200
+        content = response.content.decode()
+        for line in (
+            'yatube_request_duration_seconds_count{view="index"}',
+            'yatube_sql_queries_bucket{view="post",le="+Inf"}',
+            'yatube_template_duration_seconds_sum{view="index"}',
+            'yatube_cache_hits_total{view="index"}',
+            'yatube_cache_misses_total{view="index"}',
+        ):
+            assert line in content, f'Проверьте, что в метриках есть `{line}`'
+
+    @pytest.mark.django_db
+    def test_metrics_staff_only(self, client, user_client):
+        assert client.get('/metrics').status_code == 403
+        assert user_client.get('/metrics').status_code == 403, 'Проверьте, что метрики видят только сотрудники'
+
+    @pytest.mark.django_db
+    def test_n_plus_one_flagged(self, user, caplog):
+        for i in range(12):
+            Post.objects.create(text=f'Пост {i}', author=user)
+
+        def view(request):
+            for post in Post.objects.all():
+                post.author.username
+            return HttpResponse()
+
+        request = RequestFactory().get('/n-plus-one/')
+        request.user = AnonymousUser()
+        with caplog.at_level(logging.WARNING, logger='yatube.metrics'):
+            MetricsMiddleware(view)(request)
+        assert 'Возможный N+1' in caplog.text, 'Проверьте, что повторяющиеся SQL-запросы отмечаются'
+        assert 'yatube_n_plus_one_requests_total{view="unresolved"}' in registry.render()
+
+    def test_histogram_is_cumulative(self):
+        histogram = Histogram((1, 10))
+        histogram.observe(0.5)
+        histogram.observe(5)
+        assert histogram.snapshot() == ([1, 2, 2], 5.5, 2)
+        histogram.observe(50)
+        assert histogram.snapshot() == ([1, 2, 3], 55.5, 3), \
+            'Проверьте, что гистограмма только растёт: окно считает Prometheus'
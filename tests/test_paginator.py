@@ -1,10 +1,13 @@
 import pytest
 from django.core.paginator import Page, Paginator
 
+from tests.fixtures.fixture_queries import query_budget
+
 
 class TestGroupPaginatorView:
 
     @pytest.mark.django_db(transaction=True)
+    @query_budget('group_posts')
     def test_group_paginator_view_get(self, client, post_with_group):
         try:
             response = client.get(f'/group/{post_with_group.group.slug}')
@@ -24,6 +27,7 @@ class TestGroupPaginatorView:
             'Проверьте, что переменная `page` на странице `/group/<slug>/` типа `Page`'
 
     @pytest.mark.django_db(transaction=True)
+    @query_budget('index')
     def test_index_paginator_view_get(self, client, post_with_group):
         response = client.get(f'/')
         assert response.status_code != 404, 'Страница `/` не найдена, проверьте этот адрес в *urls.py*'
@@ -35,3 +39,67 @@ class TestGroupPaginatorView:
             'Проверьте, что передали переменную `page` в контекст страницы `/`'
         assert type(response.context['page']) == Page, \
             'Проверьте, что переменная `page` на странице `/` типа `Page`'
+
+
+class TestCursorPaginatorView:
+
+    @pytest.fixture
+    def posts(self, user, group):
+        from posts.models import Post
+        return [Post.objects.create(text=f'Тестовый пост {i}', author=user, group=group) for i in range(25)]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cursor_pages(self, client, posts, settings):
+        from posts.paginators import CursorPage, encode_cursor
+        settings.POSTS_NUMBERED_PAGES = 1
+        newest_first = posts[::-1]
+
+        response = client.get('/')
+        first_page = response.context['page']
+        assert list(first_page) == newest_first[:10], 'Проверьте порядок записей на первой странице'
+        assert first_page.next_cursor == encode_cursor(newest_first[9]), \
+            'Проверьте, что после последней номерной страницы навигация переходит на курсор'
+
+        response = client.get(f'/?before={first_page.next_cursor}')
+        second_page = response.context['page']
+        assert type(second_page) == CursorPage, 'Проверьте, что по `?before=` отдаётся `CursorPage`'
+        assert list(second_page) == newest_first[10:20], 'Проверьте, что `?before=` отдаёт более старые записи'
+        assert second_page.has_previous() and second_page.has_next()
+
+        response = client.get(f'/?before={second_page.next_cursor}')
+        third_page = response.context['page']
+        assert list(third_page) == newest_first[20:], 'Проверьте последнюю страницу курсора'
+        assert not third_page.has_next()
+
+        response = client.get(f'/?after={third_page.previous_cursor}')
+        assert list(response.context['page']) == newest_first[10:20], \
+            'Проверьте, что `?after=` отдаёт более новые записи'
+
+        response = client.get('/?before=broken')
+        assert list(response.context['page']) == newest_first[:10], \
+            'Проверьте, что некорректный курсор открывает первую страницу'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_numbered_pages_are_capped(self, client, posts, settings):
+        settings.POSTS_NUMBERED_PAGES = 2
+        content = client.get('/?page=2').content.decode()
+        assert 'href="?page=1"' in content and 'href="?page=3"' not in content, \
+            'Проверьте, что ссылок на номерные страницы не больше `POSTS_NUMBERED_PAGES`'
+        assert 'href="?before=' in content, 'Проверьте, что с последней номерной страницы ведёт курсор'
+        assert client.get('/?page=3').status_code == 404, \
+            'Проверьте, что страницы дальше `POSTS_NUMBERED_PAGES` не отдаются через OFFSET'
+        for page in ('-1', '0', 'last'):
+            assert client.get(f'/?page={page}').context['page'].number == 1, \
+                f'Проверьте, что `?page={page}` открывает первую страницу, а не последнюю'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_numbered_pages_count_is_bounded(self, client, posts, group, settings, django_assert_max_num_queries):
+        settings.POSTS_NUMBERED_PAGES = 2
+        for url in ('/', f'/group/{group.slug}/'):
+            with django_assert_max_num_queries(10) as queries:
+                response = client.get(url)
+            counts = [query['sql'] for query in queries.captured_queries if 'COUNT(' in query['sql']]
+            assert counts and all(f'LIMIT {2 * settings.POSTS_PER_PAGE + 1}' in sql for sql in counts), \
+                f'Проверьте, что `{url}` считает записи только до конца номерных страниц'
+            assert response.context['page'].has_next(), \
+                'Проверьте, что после последней номерной страницы есть следующая'
@@ -8,6 +8,7 @@ from django.db.models.query import QuerySet
 from PIL import Image
 
 from posts.models import Post
+from tests.fixtures.fixture_queries import query_budget
 
 
 def get_field_context(context, field_type):
@@ -20,6 +21,7 @@ def get_field_context(context, field_type):
 class TestPostView:
 
     @pytest.mark.django_db(transaction=True)
+    @query_budget('post')
     def test_post_view_get(self, client, post_with_group):
         try:
             response = client.get(f'/{post_with_group.author.username}/{post_with_group.id}')
@@ -13,13 +13,14 @@ def get_field_context(context, field_type):
 class TestProfileView:
 
     @pytest.mark.django_db(transaction=True)
-    def test_profile_view_get(self, client, post_with_group):
-        try:
-            response = client.get(f'/{post_with_group.author.username}')
-        except Exception as e:
-            assert False, f'''Страница `/<username>/` работает неправильно. Ошибка: `{e}`'''
-        if response.status_code in (301, 302):
-            response = client.get(f'/{post_with_group.author.username}/')
+    def test_profile_view_get(self, client, post_with_group, assert_query_budget):
+        with assert_query_budget('profile'):
+            try:
+                response = client.get(f'/{post_with_group.author.username}')
+            except Exception as e:
+                assert False, f'''Страница `/<username>/` работает неправильно. Ошибка: `{e}`'''
+            if response.status_code in (301, 302):
+                response = client.get(f'/{post_with_group.author.username}/')
         assert response.status_code != 404, 'Страница `/<username>/` не найдена, проверьте этот адрес в *urls.py*'
 
         profile_context = get_field_context(response.context, get_user_model())
@@ -0,0 +1,74 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from posts.models import Comment, Follow, Post
+from posts.search import rebuild_index
+
+
+class TestFeedQueries:
+
+    @pytest.fixture
+    def feed(self, user, group):
+        author = get_user_model().objects.create_user(username='FeedAuthor')
+        Follow.objects.create(user=user, author=author)
+        posts = [
+            Post.objects.create(text=f'Тестовый пост {i}', author=author, group=group)
+            for i in range(10)
+        ]
+        for post in posts:
+            Comment.objects.create(post=post, author=user, text='Тестовый комментарий')
+        # Таблицу FTS flush между транзакционными тестами не очищает.
+        rebuild_index(Post.objects.all())
+        return author
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feed_pages_query_budget(self, user_client, feed, group, assert_page_size_queries):
+        urls = {
+            'index': '/',
+            'group_posts': f'/group/{group.slug}/',
+            'profile': f'/{feed.username}/',
+            'follow_index': '/follow/',
+            'search': '/search/?q=пост',
+        }
+        for view, url in urls.items():
+            response = assert_page_size_queries(view, lambda: user_client.get(url))
+            assert len(response.context['page']) == 10, \
+                f'Проверьте, что на странице `{url}` выводится 10 записей'
+            assert '1 комментариев' in response.content.decode(), \
+                f'Проверьте, что на странице `{url}` выводится число комментариев'
+
+    @pytest.mark.django_db
+    def test_feed_queries_use_indexes(self):
+        from django.core.management import call_command
+        call_command('explain_feeds', stdout=StringIO())
+
+    @pytest.mark.django_db(transaction=True)
+    def test_detail_pages_query_budget(self, user_client, feed, assert_query_budget):
+        post = Post.objects.filter(author=feed).first()
+        for i in range(10):
+            commenter = get_user_model().objects.create_user(username=f'Commenter{i}')
+            Comment.objects.create(post=post, author=commenter, text=f'Комментарий {i}')
+        urls = {'post': f'/{feed.username}/{post.id}/', 'add_comment': f'/{feed.username}/{post.id}/comment/'}
+        for view, url in urls.items():
+            with assert_query_budget(view):
+                response = user_client.get(url)
+            assert response.status_code == 200, f'Страница `{url}` работает неправильно'
+            assert 'Commenter9' in response.content.decode(), f'Проверьте, что на странице `{url}` выводятся комментарии'
+        with assert_query_budget('add_comment'):
+            response = user_client.post(f'/{feed.username}/{post.id}/comment/', {'text': 'Ещё комментарий'})
+        assert response.status_code == 302
+
+    @pytest.mark.django_db
+    def test_budget_failure_shows_sql_diff(self, client, user, settings, assert_page_size_queries):
+        def get_with_n_plus_one():
+            for _ in range(settings.POSTS_PER_PAGE):
+                get_user_model().objects.filter(pk=user.pk).exists()
+            return client.get('/')
+
+        with pytest.raises(pytest.fail.Exception) as failure:
+            assert_page_size_queries('index', get_with_n_plus_one, page_sizes=(1, 3))
+        message = str(failure.value)
+        assert 'Разница с эталоном' in message and message.count('+SELECT') == 2, \
+            'Проверьте, что при росте числа запросов с размером страницы выводится разница SQL'
@@ -0,0 +1,76 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Post
+from yatube.routers import PINNED_UNTIL
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    """SQLite-копия тестовой базы, которая отстаёт, пока её не обновит sync_replicas."""
+    connections.databases['replica'] = {
+        **connections['default'].settings_dict, 'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    settings.DATABASE_REPLICAS = ['replica']
+    yield 'replica'
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
+class TestReplicas:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feeds_read_from_replica(self, client, post, replica):
+        call_command('sync_replicas', stdout=StringIO())
+        cache.clear()
+        with CaptureQueriesContext(connections[replica]) as queries:
+            response = client.get('/')
+        assert post.text in response.content.decode()
+        assert any('posts_post' in query['sql'] for query in queries), \
+            'Проверьте, что главная страница читает записи с реплики'
+        assert not response.has_header('ETag'), \
+            'Проверьте, что страница с реплики не получает ETag, который подтверждал бы её после записи'
+
+        Post.objects.create(text='Запись после копирования', author=post.author)
+        for url in ('/', f'/{post.author.username}/'):
+            assert 'Запись после копирования' not in client.get(url).content.decode(), \
+                f'Проверьте, что `{url}` читает с реплики, а не из основной базы'
+        call_command('sync_replicas', stdout=StringIO())
+        cache.clear()
+        assert 'Запись после копирования' in client.get('/').content.decode()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_author_reads_own_writes(self, user_client, post, replica):
+        call_command('sync_replicas', stdout=StringIO())
+        response = user_client.post('/new/', data={'text': 'Своя новая запись'})
+        assert response.status_code == 302
+        assert user_client.session[PINNED_UNTIL], 'Проверьте, что после записи автор закреплён за основной базой'
+        response = user_client.get('/')
+        assert 'Своя новая запись' in response.content.decode(), \
+            'Проверьте, что автор сразу видит свою запись, даже если реплика отстаёт'
+        assert response.has_header('ETag'), 'Страница из основной базы по-прежнему отдаёт ETag'
+        assert 'Своя новая запись' not in Client().get('/').content.decode()
+
+        comment_url = f'/{post.author.username}/{post.id}/comment/'
+        user_client.post(comment_url, data={'text': 'Свой комментарий'})
+        assert 'Свой комментарий' in user_client.get(f'/{post.author.username}/{post.id}/').content.decode()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pin_expires(self, user_client, settings, replica):
+        settings.DATABASE_REPLICA_STICKY_SECONDS = -1
+        call_command('sync_replicas', stdout=StringIO())
+        user_client.post('/new/', data={'text': 'Запись с истёкшим закреплением'})
+        assert 'Запись с истёкшим закреплением' not in user_client.get('/').content.decode(), \
+            'Проверьте, что по истечении окна автор снова читает с реплики'
+
+    def test_sync_replicas_requires_replicas(self, settings):
+        settings.DATABASE_REPLICAS = []
+        with pytest.raises(Exception, match='YATUBE_REPLICAS'):
+            call_command('sync_replicas', stdout=StringIO())
@@ -0,0 +1,53 @@
+import pytest
+
+from posts.models import Post
+from posts.search import stem
+
+
+class TestSearch:
+
+    def test_russian_stemming(self):
+        assert stem('котов') == stem('коты') == stem('кот'), 'Проверьте, что словоформы сводятся к одной основе'
+        assert stem('Ёлки') == stem('елка')
+
+    @pytest.mark.django_db
+    def test_search_finds_word_forms(self, client, user, assert_query_budget):
+        match = Post.objects.create(text='Мы гуляли с котами по парку', author=user)
+        Post.objects.create(text='Запись про собак', author=user)
+        with assert_query_budget('search'):
+            response = client.get('/search/', {'q': 'кот'})
+        assert response.status_code == 200, 'Страница `/search/` работает неправильно'
+        assert list(response.context['page']) == [match], \
+            'Проверьте, что поиск находит записи с другими формами слова'
+
+    @pytest.mark.django_db
+    def test_ranking_and_cursor(self, client, user, settings):
+        settings.POSTS_PER_PAGE = 2
+        best = Post.objects.create(text='кот кот кот', author=user)
+        others = [Post.objects.create(text=f'кот и другие слова номер {i} в длинной записи', author=user) for i in range(3)]
+        page = client.get('/search/', {'q': 'кот'}).context['page']
+        assert page[0] == best, 'Проверьте, что результаты упорядочены по релевантности'
+        seen = list(page)
+        while page.next_cursor:
+            page = client.get('/search/', {'q': 'кот', 'cursor': page.next_cursor}).context['page']
+            seen += list(page)
+        assert sorted(post.pk for post in seen) == sorted([best.pk] + [post.pk for post in others]), \
+            'Проверьте, что курсор проходит все результаты без повторов'
+
+    @pytest.mark.django_db
+    def test_index_follows_edits(self, client, user):
+        post = Post.objects.create(text='старый текст', author=user)
+        post.text = 'новый текст'
+        post.save()
+        assert not list(client.get('/search/', {'q': 'старый'}).context['page']), \
+            'Проверьте, что редактирование обновляет индекс'
+        assert list(client.get('/search/', {'q': 'новый'}).context['page']) == [post]
+        post.delete()
+        assert not list(client.get('/search/', {'q': 'новый'}).context['page']), \
+            'Проверьте, что удалённые записи пропадают из индекса'
+
+    @pytest.mark.django_db
+    def test_query_syntax_is_escaped(self, client):
+        for query in ('"', 'a OR', 'NEAR(', '*', '-'):
+            assert client.get('/search/', {'q': query}).status_code == 200, \
+                'Проверьте, что спецсимволы FTS в запросе не приводят к ошибке'
@@ -0,0 +1,81 @@
+import importlib
+
+import pytest
+from django.core.checks import run_checks
+from django.db import connections
+from django.test.utils import override_settings
+
+from yatube import settings_module
+from yatube.backends.sqlite3.base import DatabaseWrapper
+from yatube.checks import PERFORMANCE
+
+
+def production_settings(monkeypatch):
+    monkeypatch.setenv('DJANGO_SECRET_KEY', 'production-secret')
+    module = importlib.reload(importlib.import_module('yatube.settings_production'))
+    return {name: getattr(module, name) for name in dir(module) if name.isupper()}
+
+
+def warning_ids(**overrides):
+    with override_settings(**overrides):
+        return {message.id for message in run_checks(tags=[PERFORMANCE])}
+
+
+class TestSettings:
+
+    def test_settings_module_from_environment(self, monkeypatch):
+        monkeypatch.delenv('YATUBE_ENV', raising=False)
+        assert settings_module() == 'yatube.settings'
+        monkeypatch.setenv('YATUBE_ENV', 'production')
+        assert settings_module() == 'yatube.settings_production'
+        monkeypatch.setenv('YATUBE_ENV', 'staging')
+        with pytest.raises(ValueError):
+            settings_module()
+
+    def test_production_settings_pass_checks(self, monkeypatch):
+        production = production_settings(monkeypatch)
+        assert production['DEBUG'] is False
+        assert warning_ids(**production) == set(), 'Проверьте, что продакшен-настройки проходят проверки горячего пути'
+
+    def test_production_replicas_keep_connections(self, monkeypatch):
+        monkeypatch.setenv('YATUBE_REPLICAS', '/tmp/yatube-replica.sqlite3')
+        importlib.reload(importlib.import_module('yatube.settings'))
+        try:
+            production = production_settings(monkeypatch)
+        finally:
+            monkeypatch.delenv('YATUBE_REPLICAS')
+            importlib.reload(importlib.import_module('yatube.settings'))
+        assert production['DATABASES']['replica1']['CONN_MAX_AGE'], \
+            'Проверьте, что соединения с репликами тоже живут между запросами'
+        assert warning_ids(**production) == set()
+
+    def test_checks_warn_on_misconfiguration(self, monkeypatch):
+        production = production_settings(monkeypatch)
+        databases = {'default': {**production['DATABASES']['default'], 'CONN_MAX_AGE': 0, 'OPTIONS': {}}}
+        production.update(
+            DEBUG=True,
+            SECRET_KEY=importlib.import_module('yatube.settings').SECRET_KEY,
+            DATABASES=databases,
+            SESSION_ENGINE='django.contrib.sessions.backends.db',
+            MIDDLEWARE=production['MIDDLEWARE'][:1] + production['MIDDLEWARE'][2:],
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        )
+        production['TEMPLATES'] = [{**production['TEMPLATES'][0], 'OPTIONS': {'loaders': []}}]
+        assert warning_ids(**production) == {f'yatube.W00{number}' for number in range(1, 9)}
+
+    def test_checks_silent_in_development(self):
+        assert warning_ids() == set(), 'Проверьте, что в настройках разработки проверки молчат'
+
+    def test_backend_applies_pragmas(self, tmp_path):
+        wrapper = DatabaseWrapper({
+            **connections['default'].settings_dict,
+            'NAME': str(tmp_path / 'db.sqlite3'),
+            'OPTIONS': {'pragmas': {'journal_mode': 'wal', 'synchronous': 'normal'}},
+        })
+        connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            assert connection.execute('PRAGMA synchronous').fetchone()[0] == 1, \
+                'Проверьте, что PRAGMA из OPTIONS выполняются на новом соединении'
+        finally:
+            connection.close()
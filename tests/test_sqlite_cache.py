@@ -0,0 +1,70 @@
+import multiprocessing
+import time
+
+import pytest
+
+from yatube.sqlite_cache import SQLiteCache
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    return SQLiteCache(str(tmp_path / 'cache.sqlite3'), {'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_CHECK_PROBABILITY': 1}})
+
+
+def increment_in_child(location, times):
+    child_cache = SQLiteCache(location, {})
+    for _ in range(times):
+        child_cache.incr('counter')
+
+
+class TestSQLiteCache:
+
+    def test_get_set_add_delete(self, sqlite_cache):
+        sqlite_cache.set('key', {'value': [1, 2]})
+        assert sqlite_cache.get('key') == {'value': [1, 2]}
+        assert not sqlite_cache.add('key', 'другое')
+        assert sqlite_cache.add('new', 'значение')
+        sqlite_cache.delete('key')
+        assert sqlite_cache.get('key', 'нет') == 'нет'
+        assert sqlite_cache.has_key('new')
+
+    def test_expiration(self, sqlite_cache):
+        sqlite_cache.set('short', 1, timeout=0.05)
+        sqlite_cache.set('forever', 1, timeout=None)
+        time.sleep(0.1)
+        assert sqlite_cache.get('short') is None
+        assert sqlite_cache.add('short', 2)
+        assert sqlite_cache.get('forever') == 1
+
+    def test_incr(self, sqlite_cache):
+        sqlite_cache.set('counter', 1)
+        assert sqlite_cache.incr('counter', 5) == 6
+        assert sqlite_cache.decr('counter') == 5
+        with pytest.raises(ValueError):
+            sqlite_cache.incr('missing')
+
+    def test_lru_eviction(self, sqlite_cache, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr(time, 'time', lambda: clock[0])
+        for i in range(10):
+            clock[0] += 100
+            sqlite_cache.set(f'key{i}', i, timeout=None)
+        clock[0] += 100
+        assert sqlite_cache.get('key0') == 0
+        sqlite_cache.set('key10', 10, timeout=None)
+        assert sqlite_cache.get('key0') == 0, 'Недавно прочитанная запись не должна вытесняться'
+        assert sqlite_cache.get('key1') is None, 'Давно не читанная запись должна вытесняться'
+        assert sqlite_cache.get('key10') == 10
+
+    def test_shared_between_processes(self, sqlite_cache, tmp_path):
+        sqlite_cache.set('counter', 0)
+        location = str(tmp_path / 'cache.sqlite3')
+        processes = [
+            multiprocessing.Process(target=increment_in_child, args=(location, 50))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert sqlite_cache.get('counter') == 200, 'Проверьте атомарность incr между процессами'
@@ -0,0 +1,69 @@
+import os
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from posts.images import generate_thumbnail, thumbnail_key
+from posts.models import Post
+
+
+def make_image(name='image.png', color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (400, 300), color=color).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class TestContentAddressedStorage:
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+
+    def stored_files(self, tmp_path):
+        return sorted(str(path.relative_to(tmp_path)) for path in (tmp_path / 'posts').rglob('*') if path.is_file())
+
+    @pytest.mark.django_db(transaction=True)
+    def test_identical_uploads_stored_once(self, user, tmp_path):
+        first = Post.objects.create(text='Первый', author=user, image=make_image('meme.png'))
+        second = Post.objects.create(text='Второй', author=user, image=make_image('MEME-copy.PNG'))
+        other = Post.objects.create(text='Другой', author=user, image=make_image('meme.png', color='blue'))
+        assert first.image.name == second.image.name, \
+            'Проверьте, что одинаковые файлы получают одно имя независимо от исходного'
+        assert other.image.name != first.image.name
+        assert self.stored_files(tmp_path) == sorted([first.image.name, other.image.name]), \
+            'Проверьте, что одинаковое содержимое хранится один раз'
+        directory, name = os.path.split(first.image.name)
+        assert directory == f'posts/{name[:2]}/{name[2:4]}', \
+            'Проверьте, что файлы раскладываются по подкаталогам по началу хэша'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_thumbnails_shared(self, user):
+        from django.core.cache import cache
+        first = Post.objects.create(text='Первый', author=user, image=make_image('a.png'))
+        generate_thumbnail(first.image)
+        second = Post.objects.create(text='Второй', author=user, image=make_image('b.png'))
+        assert cache.get(thumbnail_key(second.image.name)) is not None, \
+            'Проверьте, что записи с одинаковым изображением делят миниатюру'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cleanup_media(self, user, tmp_path):
+        kept = Post.objects.create(text='Остаётся', author=user, image=make_image('a.png'))
+        shared = Post.objects.create(text='Общий', author=user, image=make_image('b.png'))
+        orphan = Post.objects.create(text='Удаляется', author=user, image=make_image('c.png', color='green'))
+        generate_thumbnail(orphan.image)
+        orphan_name = orphan.image.name
+        orphan.delete()
+        shared.delete()
+
+        call_command('cleanup_media', min_age=3600, stdout=StringIO())
+        assert orphan_name in self.stored_files(tmp_path), 'Проверьте, что свежие файлы не удаляются'
+
+        call_command('cleanup_media', min_age=0, stdout=StringIO())
+        assert self.stored_files(tmp_path) == [kept.image.name], \
+            'Проверьте, что удаляются только файлы без ссылок из записей'
+        stem = orphan_name.rsplit('.', 1)[0]
+        assert not [path for path in (tmp_path / 'derivatives' / stem).rglob('*') if path.is_file()], \
+            'Проверьте, что вместе с файлом удаляются его уменьшенные копии'
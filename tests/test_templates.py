@@ -0,0 +1,43 @@
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.template import engines
+from django.test.utils import override_settings
+
+from posts.management.commands.bench_templates import templates_setting
+from yatube.template_cache import is_cached, warm_templates
+
+CACHED_TEMPLATES = templates_setting([('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS)])
+
+
+class TestTemplateCache:
+
+    def test_warm_fills_cached_loader(self):
+        with override_settings(TEMPLATES=CACHED_TEMPLATES):
+            engine = engines['django'].engine
+            assert is_cached(engine)
+            names, errors = warm_templates()
+            assert not errors, f'Проверьте шаблоны: {errors}'
+            assert {'index.html', 'includes/post_card.html', 'includes/paginator.html'} <= set(names)
+            assert len(engine.template_loaders[0].get_template_cache) >= len(names), \
+                'Проверьте, что прогрев компилирует все шаблоны в кэш загрузчика'
+
+    def test_warm_templates_reports_syntax_errors(self, tmp_path):
+        (tmp_path / 'broken.html').write_text('{% if %}')
+        templates = templates_setting(settings.TEMPLATE_LOADERS)
+        templates[0]['DIRS'] = [str(tmp_path)]
+        with override_settings(TEMPLATES=templates):
+            errors = StringIO()
+            with pytest.raises(CommandError):
+                call_command('warm_templates', stdout=StringIO(), stderr=errors)
+        assert 'broken.html' in errors.getvalue(), 'Проверьте, что команда называет шаблон с ошибкой'
+
+    @pytest.mark.django_db
+    def test_bench_templates(self, post_with_group):
+        out = StringIO()
+        call_command('bench_templates', requests=2, stdout=out)
+        for view in ('index', 'group_posts', 'profile', 'post'):
+            assert view in out.getvalue(), f'Проверьте, что в отчёте есть страница `{view}`'
@@ -0,0 +1,95 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+import posts.views  # noqa: F401 — до monkeypatch ниже, иначе представления запомнят подменённую функцию
+from posts.cache import bump_generations
+from posts.models import Post
+
+
+def make_image(name='image.png', size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color='red').save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class TestThumbnails:
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_original_served_until_thumbnail_ready(self, client, user, monkeypatch):
+        scheduled = []
+        monkeypatch.setattr('posts.images.schedule_thumbnail', scheduled.append)
+        post = Post.objects.create(text='Пост с картинкой', author=user, image=make_image())
+        response = client.get('/')
+        assert f'src="{post.image.url}"' in response.content.decode(), \
+            'Проверьте, что до готовности миниатюры выводится исходное изображение'
+        assert [image.name for image in scheduled] == [post.image.name], \
+            'Проверьте, что отсутствующая миниатюра ставится в очередь'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_thumbnail_generated_after_post_new(self, user_client, settings):
+        settings.THUMBNAIL_ASYNC = False
+        response = user_client.post('/new/', {'text': 'Пост с картинкой', 'image': make_image()})
+        assert response.status_code == 302
+        post = Post.objects.get()
+        content = user_client.get('/').content.decode()
+        assert f'src="{post.image.url}"' not in content, \
+            'Проверьте, что после сохранения записи готовится миниатюра'
+        assert 'src="/media/cache/' in content, 'Проверьте, что в карточке выводится миниатюра'
+        assert '<source type="image/webp"' in content, 'Проверьте, что в карточке выводятся копии в WebP'
+        stem = post.image.name.rsplit('.', 1)[0]
+        assert f'/media/derivatives/{stem}/480.webp 480w' in content
+        assert '960w' in content and '1440w' not in content, \
+            'Проверьте, что копии шире исходного изображения не создаются'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_ready_thumbnail_resets_cached_pages(self, client, user, settings):
+        settings.THUMBNAIL_ASYNC = False
+        post = Post.objects.create(text='Пост с картинкой', author=user, image=make_image())
+        first = client.get('/')
+        assert f'src="{post.image.url}"' in first.content.decode()
+        response = client.get('/', HTTP_IF_NONE_MATCH=first['ETag'])
+        assert response.status_code == 200 and f'src="{post.image.url}"' not in response.content.decode(), \
+            'Проверьте, что готовая миниатюра сбрасывает закэшированные страницы с исходником'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_broken_image_not_rescheduled(self, client, user, settings, tmp_path, monkeypatch):
+        import posts.images
+        settings.THUMBNAIL_ASYNC = False
+        generated = []
+        generate = posts.images.generate_thumbnail
+        monkeypatch.setattr(posts.images, 'generate_thumbnail', lambda image: (generated.append(image), generate(image)))
+        post = Post.objects.create(text='Битая картинка', author=user, image=make_image())
+        (tmp_path / post.image.name).write_bytes(b'not an image')
+        for _ in range(3):
+            bump_generations('index')
+            assert f'src="{post.image.url}"' in client.get('/').content.decode()
+        assert len(generated) == 1, 'Проверьте, что после неудачи миниатюра не заказывается на каждом показе'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_build_derivatives_command(self, client, user, tmp_path, monkeypatch):
+        from django.core.cache import cache
+        from django.core.management import call_command
+
+        from posts.images import derivatives_key
+        monkeypatch.setattr('posts.images.schedule_thumbnail', lambda image: None)
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=user, image=make_image(f'image{i}.png'))
+            for i in range(3)
+        ]
+        assert '<source' not in client.get('/').content.decode()
+        call_command('build_derivatives', workers=2, stdout=StringIO())
+        assert client.get('/').content.decode().count('<source type="image/webp"') == len(posts), \
+            'Проверьте, что команда сбрасывает закэшированные страницы с записями, для которых создала копии'
+        for post in posts:
+            stem = post.image.name.rsplit('.', 1)[0]
+            assert (tmp_path / 'derivatives' / stem / '480.webp').exists(), \
+                'Проверьте, что команда создаёт копии для существующих записей'
+            assert cache.get(derivatives_key(post.image.name)), \
+                'Проверьте, что команда сохраняет srcset копий в кэше'
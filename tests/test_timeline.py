@@ -0,0 +1,166 @@
+import datetime
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+
+from posts.models import Follow, Post, TimelineEntry
+from posts.timelines import CacheTimelineBackend, get_timeline_backend
+from tests.fixtures.fixture_queries import QUERY_BUDGETS
+
+BACKENDS = (
+    'posts.timelines.DatabaseTimelineBackend',
+    'posts.timelines.CacheTimelineBackend',
+)
+
+
+class TestTimeline:
+
+    @pytest.fixture
+    def authors(self):
+        return [get_user_model().objects.create_user(username=f'TimelineAuthor{i}') for i in range(2)]
+
+    def timeline_ids(self, user):
+        return [post_id for _, post_id in get_timeline_backend().entries(user)]
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    @pytest.mark.django_db(transaction=True)
+    def test_fan_out_backfill_and_prune(self, user, authors, settings, backend):
+        settings.TIMELINE_BACKEND = backend
+        first, second = authors
+        old_post = Post.objects.create(text='Старый пост', author=first)
+
+        Follow.objects.create(user=user, author=first)
+        assert self.timeline_ids(user) == [old_post.id], \
+            'Проверьте, что при подписке лента заполняется записями автора'
+
+        Follow.objects.create(user=user, author=second)
+        new_posts = [
+            Post.objects.create(text='Новый пост 1', author=second),
+            Post.objects.create(text='Новый пост 2', author=first),
+        ]
+        assert self.timeline_ids(user) == [new_posts[1].id, new_posts[0].id, old_post.id], \
+            'Проверьте, что новые записи попадают в ленты подписчиков'
+
+        Follow.objects.filter(user=user, author=first).delete()
+        assert self.timeline_ids(user) == [new_posts[0].id], \
+            'Проверьте, что при отписке записи автора удаляются из ленты'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_database_timeline_is_bounded(self, user, authors, settings):
+        settings.TIMELINE_MAX_LENGTH = 3
+        author = authors[0]
+        posts = [Post.objects.create(text=f'Пост {i}', author=author) for i in range(5)]
+        Follow.objects.create(user=user, author=author)
+        assert TimelineEntry.objects.filter(user=user).count() == 3
+        assert self.timeline_ids(user) == [post.id for post in posts[:1:-1]]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_database_timeline_is_bounded_on_push(self, user, authors, settings, django_assert_max_num_queries):
+        settings.TIMELINE_MAX_LENGTH = 3
+        author, fan = authors
+        Follow.objects.create(user=user, author=author)
+        Follow.objects.create(user=fan, author=author)
+        posts = [Post.objects.create(text=f'Пост {i}', author=author) for i in range(10)]
+        for follower in (user, fan):
+            assert TimelineEntry.objects.filter(user=follower).count() == 3, \
+                'Проверьте, что после рассылки записи лента обрезается до TIMELINE_MAX_LENGTH'
+            assert self.timeline_ids(follower) == [post.id for post in posts[:-4:-1]]
+        with django_assert_max_num_queries(10) as queries:
+            get_timeline_backend().push(posts[-1], [user.pk, fan.pk])
+        deletes = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('DELETE')]
+        assert len(deletes) == 1, 'Проверьте, что ленты всех подписчиков обрезаются одним запросом'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cache_timeline_rebuilds_after_eviction(self, user, authors, settings):
+        settings.TIMELINE_BACKEND = 'posts.timelines.CacheTimelineBackend'
+        Follow.objects.create(user=user, author=authors[0])
+        post = Post.objects.create(text='Пост', author=authors[0])
+        cache.clear()
+        assert self.timeline_ids(user) == [post.id], \
+            'Проверьте, что вытесненная из кэша лента собирается заново'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_index_reads_timeline(self, user_client, user, authors, assert_query_budget):
+        author = authors[0]
+        Follow.objects.create(user=user, author=author)
+        post = Post.objects.create(text='Пост из ленты', author=author)
+        TimelineEntry.objects.filter(user=user).delete()
+        with assert_query_budget('follow_index'):
+            response = user_client.get('/follow/')
+        assert post.text not in response.content.decode(), \
+            'Проверьте, что `/follow/` читает записи из материализованной ленты'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_popular_authors_are_pulled_on_read(self, user_client, user, authors, settings, assert_query_budget):
+        settings.TIMELINE_FANOUT_THRESHOLD = 1
+        popular, regular = authors
+        fan = get_user_model().objects.create_user(username='Fan')
+        Follow.objects.create(user=fan, author=popular)
+        Follow.objects.create(user=user, author=popular)
+        Follow.objects.create(user=user, author=regular)
+        posts = [
+            Post.objects.create(text='Пост популярного автора 1', author=popular),
+            Post.objects.create(text='Пост обычного автора', author=regular),
+            Post.objects.create(text='Пост популярного автора 2', author=popular),
+        ]
+        assert not TimelineEntry.objects.filter(post__author=popular).exists(), \
+            'Проверьте, что записи популярных авторов не раскладываются по лентам'
+        assert self.timeline_ids(user) == [posts[1].id]
+
+        # Каждый популярный автор — ещё один запрос.
+        with assert_query_budget(QUERY_BUDGETS['follow_index'] + 1, '/follow/') as queries:
+            response = user_client.get('/follow/')
+        assert list(response.context['page']) == posts[::-1], \
+            'Проверьте, что `/follow/` сливает ленту с записями популярных авторов по дате'
+        assert not any('COUNT(' in query['sql'] for query in queries.captured_queries), \
+            'Проверьте, что популярные авторы определяются по счётчикам, а не подсчётом подписчиков'
+        pulled = [query['sql'] for query in queries.captured_queries
+                  if query['sql'].startswith('SELECT "posts_post"."pub_date", "posts_post"."id" FROM')]
+        assert pulled and all(sql.endswith('LIMIT 11') for sql in pulled), \
+            'Проверьте, что у популярного автора читается не больше записей, чем нужно до конца страницы'
+
+    def test_cache_timeline_concurrent_pushes(self, monkeypatch):
+        # Чтение ленты с задержкой, чтобы потоки наверняка перемежались между чтением и записью.
+        # Кэши у каждого потока свои, поэтому подменяется метод класса.
+        backend_class = type(caches['default'])
+        for name in ('get', 'get_many'):
+            read = getattr(backend_class, name)
+            monkeypatch.setattr(
+                backend_class, name, lambda *args, read=read, **kwargs: (read(*args, **kwargs), time.sleep(0.01))[0]
+            )
+        backend = CacheTimelineBackend(max_length=100)
+        key = backend.make_key(1)
+        cache.set(key, [], timeout=None)
+        start = datetime.datetime(2020, 1, 1)
+        posts = [SimpleNamespace(pk=i, pub_date=start + datetime.timedelta(minutes=i)) for i in range(20)]
+        random.Random(1).shuffle(posts)
+        barrier = threading.Barrier(len(posts))
+
+        def push(post):
+            barrier.wait()
+            backend.push(post, [1])
+
+        threads = [threading.Thread(target=push, args=(post,)) for post in posts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert [post_id for _, post_id in cache.get(key)] == list(range(19, -1, -1)), \
+            'Проверьте, что одновременные записи не затирают ленту друг друга и сохраняют порядок по дате'
+
+    def test_cache_timeline_push_out_of_order(self):
+        backend = CacheTimelineBackend(max_length=3)
+        key = backend.make_key(1)
+        cache.set(key, [], timeout=None)
+        start = datetime.datetime(2020, 1, 1)
+        for i in (2, 0, 3, 1, 4, 1):
+            backend.push(SimpleNamespace(pk=i, pub_date=start + datetime.timedelta(minutes=i)), [1])
+        assert [post_id for _, post_id in cache.get(key)] == [4, 3, 2], \
+            'Проверьте, что запоздавшая запись встаёт на своё место, а лента не длиннее max_length'
+        backend.push(SimpleNamespace(pk=0, pub_date=start), [1])
+        assert [post_id for _, post_id in cache.get(key)] == [4, 3, 2]
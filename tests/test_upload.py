@@ -0,0 +1,70 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from posts.models import Post
+
+
+def make_image(size=(40, 30), name='image.png'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color='blue').save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class TestImageUpload:
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_valid_image_stored(self, user_client, tmp_path):
+        image = make_image()
+        response = user_client.post('/new/', {'text': 'Пост с картинкой', 'image': image})
+        assert response.status_code == 302, 'Проверьте, что корректное изображение принимается'
+        post = Post.objects.get()
+        image.seek(0)
+        assert (tmp_path / post.image.name).read_bytes() == image.read()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_oversized_file_rejected(self, user_client, settings):
+        settings.IMAGE_UPLOAD_MAX_SIZE = 10
+        response = user_client.post('/new/', {'text': 'Пост', 'image': make_image()})
+        assert response.status_code == 200
+        assert response.context['form'].errors['image'] == ['Размер файла не должен превышать 0 МБ.'], \
+            'Проверьте, что слишком большой файл отклоняется с понятной причиной'
+        assert response.context['form'].data['text'] == 'Пост'
+        assert Post.objects.count() == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_too_many_pixels_rejected(self, user_client, settings, monkeypatch):
+        settings.IMAGE_UPLOAD_MAX_PIXELS = 1000
+        image = make_image(size=(100, 100))
+        decoded = []
+        monkeypatch.setattr(Image.Image, 'load', lambda image: decoded.append(image))
+        response = user_client.post('/new/', {'text': 'Пост', 'image': image})
+        assert 'image' in response.context['form'].errors, \
+            'Проверьте, что изображение с большим числом пикселей отклоняется'
+        assert not decoded, 'Проверьте, что изображение отклоняется до распаковки'
+
+    def test_upload_handler_hashes_and_caps(self, settings, rf):
+        import hashlib
+
+        from django.core.files.uploadhandler import SkipFile
+
+        from posts.uploadhandlers import HashingUploadHandler, oversized_uploads
+        settings.IMAGE_UPLOAD_MAX_SIZE = 10
+        handler = HashingUploadHandler(rf.post('/'))
+        handler.new_file('image', 'image.png', 'image/png', 8)
+        handler.receive_data_chunk(b'12345678', 0)
+        uploaded = handler.file_complete(8)
+        assert uploaded.sha256 == hashlib.sha256(b'12345678').hexdigest()
+
+        handler.new_file('image', 'image.png', 'image/png', 16)
+        handler.receive_data_chunk(b'12345678', 0)
+        with pytest.raises(SkipFile):
+            handler.receive_data_chunk(b'12345678', 8)
+        assert oversized_uploads(handler.request) == {'image'}, \
+            'Проверьте, что загрузка файла прерывается, как только он превышает лимит'
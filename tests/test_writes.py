@@ -0,0 +1,100 @@
+import queue
+from concurrent.futures import Future, TimeoutError
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+
+from posts import writes
+from posts.models import Comment, Follow
+
+
+class TestWriteQueue:
+
+    @pytest.fixture
+    def author(self, django_user_model):
+        return django_user_model.objects.create_user(username='WriteQueueAuthor')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_submit_writes_from_queue_thread(self, post, user, author):
+        writes.submit(Comment(post=post, author=user, text='Комментарий из очереди').save)
+        assert Comment.objects.filter(text='Комментарий из очереди').exists(), \
+            'Проверьте, что запись из очереди закоммичена к моменту возврата submit'
+        follow, created = writes.submit(lambda: Follow.objects.get_or_create(user=user, author=author))
+        assert created and follow.pk
+        with pytest.raises(IntegrityError):
+            writes.submit(lambda: Follow.objects.create(user=user, author=author))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_failed_write_does_not_roll_back_batch(self, post, user, author):
+        def fail():
+            raise ValueError('ошибка записи')
+
+        batch = [
+            (lambda: Comment.objects.create(post=post, author=user, text='Первый'), Future()),
+            (fail, Future()),
+            (lambda: Follow.objects.create(user=user, author=author), Future()),
+        ]
+        writes.write_batch(batch)
+        assert batch[0][1].result().text == 'Первый'
+        assert isinstance(batch[1][1].exception(), ValueError)
+        assert Comment.objects.filter(text='Первый').exists() and Follow.objects.filter(user=user).exists(), \
+            'Проверьте, что ошибка одной записи откатывает только её'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_queue_survives_connection_errors(self, post, user, monkeypatch):
+        calls = []
+
+        def close_fails():
+            calls.append(True)
+            if len(calls) == 1:
+                raise RuntimeError('соединение потеряно')
+
+        monkeypatch.setattr(connection, 'close_if_unusable_or_obsolete', close_fails)
+        batch = [(lambda: 'записано', Future())]
+        with pytest.raises(RuntimeError):
+            writes.write_batch(batch)
+        assert batch[0][1].result(timeout=0) == 'записано', \
+            'Проверьте, что результаты отдаются до закрытия соединения'
+
+        requests = writes.get_queue()
+        broken = Future()
+        monkeypatch.setattr(writes, 'write_batch', lambda batch: 1 / 0)
+        requests.put((lambda: None, broken))
+        assert isinstance(broken.exception(timeout=5), ZeroDivisionError), \
+            'Проверьте, что ошибка пачки отдаётся всем её запросам'
+        monkeypatch.undo()
+        writes.submit(Comment(post=post, author=user, text='После сбоя').save)
+        assert Comment.objects.filter(text='После сбоя').exists(), \
+            'Проверьте, что поток очереди продолжает работать после ошибки'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_submit_gives_up_after_timeout(self, settings, monkeypatch):
+        settings.WRITE_BATCH_TIMEOUT = 0.01
+        stalled = queue.Queue()
+        monkeypatch.setattr(writes, 'get_queue', lambda: stalled)
+        with pytest.raises(TimeoutError):
+            writes.submit(lambda: 'никогда')
+        function, future = stalled.get_nowait()
+        assert future.cancelled(), 'Проверьте, что запись, не дождавшаяся очереди, снимается'
+
+    @pytest.mark.django_db
+    def test_submit_inside_transaction_runs_inline(self, post, user):
+        assert connection.in_atomic_block
+        writes.submit(Comment(post=post, author=user, text='Сразу').save)
+        assert Comment.objects.filter(text='Сразу').exists(), \
+            'Проверьте, что внутри транзакции запись выполняется в ней же'
+
+    def test_sqlite_pragmas_and_immediate_transactions(self):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Только для SQLite')
+        assert connection.settings_dict['OPTIONS']['pragmas']['journal_mode'] == 'wal'
+        assert connection.settings_dict['OPTIONS']['transaction_mode'] == 'IMMEDIATE'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bench_writes(self, post):
+        out = StringIO()
+        call_command('bench_writes', writers=2, readers=1, operations=5, stdout=out)
+        for mode in ('direct', 'queue'):
+            assert mode in out.getvalue(), f'Проверьте, что в отчёте есть режим `{mode}`'
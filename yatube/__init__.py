@@ -0,0 +1,14 @@
+import os
+
+SETTINGS_MODULES = {
+    'development': 'yatube.settings',
+    'production': 'yatube.settings_production',
+}
+
+
+def settings_module():
+    """Модуль настроек для YATUBE_ENV; без переменной — настройки разработки."""
+    environment = os.environ.get('YATUBE_ENV', 'development')
+    if environment not in SETTINGS_MODULES:
+        raise ValueError(f'YATUBE_ENV должна быть одной из: {", ".join(SETTINGS_MODULES)}; получено {environment!r}')
+    return SETTINGS_MODULES[environment]
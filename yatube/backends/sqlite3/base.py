@@ -0,0 +1,34 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с настройками соединения из OPTIONS.
+
+    'pragmas' выполняются на каждом новом соединении, например
+    {'journal_mode': 'wal', 'synchronous': 'normal'}. 'transaction_mode'
+    ('DEFERRED', 'IMMEDIATE' или 'EXCLUSIVE') задаёт, как начинаются
+    транзакции transaction.atomic().
+    """
+
+    pragmas = {}
+    transaction_mode = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        self.transaction_mode = params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        # Транзакция с блокировкой записи с самого начала ждёт её busy timeout'ом;
+        # отложенная же при попытке записать после чтения сразу получает «database is locked».
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,91 @@
+"""Проверки настроек горячего пути для продакшена.
+
+Django выполняет их при старте manage.py-команд, а wsgi.py — при запуске
+сервера. В настройках разработки (ENVIRONMENT = 'development') молчат все,
+кроме проверки реплик.
+"""
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from django.utils.module_loading import import_string
+
+PERFORMANCE = 'performance'
+
+SQLITE_ENGINES = ('django.db.backends.sqlite3', 'yatube.backends.sqlite3')
+LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache', 'django.core.cache.backends.dummy.DummyCache')
+
+
+def uses_cached_loader(loaders):
+    return any(isinstance(loader, (tuple, list)) and loader[0].endswith('cached.Loader') for loader in loaders)
+
+
+@register(PERFORMANCE)
+def check_hot_path(app_configs, **kwargs):
+    if settings.ENVIRONMENT != 'production':
+        return []
+    from yatube import settings as development
+
+    warnings = []
+    if settings.DEBUG:
+        warnings.append(Warning(
+            'DEBUG включён: шаблоны не кэшируются, а каждый SQL-запрос запоминается в памяти.',
+            hint='DEBUG = False', id='yatube.W001',
+        ))
+    if settings.SECRET_KEY == development.SECRET_KEY:
+        warnings.append(Warning(
+            'SECRET_KEY совпадает с ключом из репозитория.',
+            hint='Задайте переменную окружения DJANGO_SECRET_KEY.', id='yatube.W002',
+        ))
+    for alias, database in settings.DATABASES.items():
+        if not database.get('CONN_MAX_AGE'):
+            warnings.append(Warning(
+                f'База {alias!r} открывает новое соединение на каждый запрос.',
+                hint='Задайте CONN_MAX_AGE.', id='yatube.W003',
+            ))
+        if database['ENGINE'] not in SQLITE_ENGINES:
+            continue
+        pragmas = database.get('OPTIONS', {}).get('pragmas', {})
+        if database['ENGINE'] != 'yatube.backends.sqlite3' or str(pragmas.get('journal_mode')).lower() != 'wal':
+            warnings.append(Warning(
+                f'SQLite-база {alias!r} не в режиме WAL: запись блокирует всех читателей.',
+                hint="ENGINE = 'yatube.backends.sqlite3' и OPTIONS['pragmas']['journal_mode'] = 'wal'.",
+                id='yatube.W004',
+            ))
+    if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.db':
+        warnings.append(Warning(
+            'Сессии читаются из базы на каждом запросе.',
+            hint="SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db' или signed_cookies.",
+            id='yatube.W005',
+        ))
+    for template in settings.TEMPLATES:
+        if template['BACKEND'].endswith('DjangoTemplates') and \
+                not uses_cached_loader(template.get('OPTIONS', {}).get('loaders', [])):
+            warnings.append(Warning(
+                'Шаблоны разбираются заново на каждом запросе.',
+                hint='Оберните загрузчики в django.template.loaders.cached.Loader.', id='yatube.W006',
+            ))
+    if 'django.middleware.gzip.GZipMiddleware' not in settings.MIDDLEWARE:
+        warnings.append(Warning(
+            'Ответы отдаются без сжатия.',
+            hint='Добавьте django.middleware.gzip.GZipMiddleware в начало MIDDLEWARE.', id='yatube.W007',
+        ))
+    backend = import_string(settings.CACHES['default']['BACKEND'])
+    if any(issubclass(backend, import_string(path)) for path in LOCAL_CACHES):
+        warnings.append(Warning(
+            'Кэш по умолчанию не общий для воркеров: сброс поколений страниц не дойдёт до других процессов.',
+            hint='Используйте yatube.sqlite_cache.SQLiteCache или другой общий кэш.', id='yatube.W008',
+        ))
+    return warnings
+
+
+@register(PERFORMANCE)
+def check_replicas(app_configs, **kwargs):
+    errors = [
+        Error(f'Реплики {alias!r} нет в DATABASES.', id='yatube.E001')
+        for alias in settings.DATABASE_REPLICAS if alias not in settings.DATABASES
+    ]
+    if settings.DATABASE_REPLICAS and 'yatube.routers.ReplicaRouter' not in settings.DATABASE_ROUTERS:
+        errors.append(Warning(
+            'Реплики настроены, но чтение на них не направляется.',
+            hint="Добавьте 'yatube.routers.ReplicaRouter' в DATABASE_ROUTERS.", id='yatube.W009',
+        ))
+    return errors
@@ -0,0 +1,254 @@
+"""Метрики запросов по именам URL: время ответа, SQL, шаблоны и кэш.
+
+Данные копятся в памяти процесса с момента запуска: время и число
+запросов — в накопительных гистограммах, остальное — в счётчиках. Страница
+/metrics отдаёт их сотрудникам в текстовом формате Prometheus.
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import HttpResponse
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': ('Время обработки запроса', TIME_BUCKETS),
+    'yatube_sql_queries': ('Число SQL-запросов на запрос', COUNT_BUCKETS),
+    'yatube_sql_duration_seconds': ('Время SQL-запросов на запрос', TIME_BUCKETS),
+    'yatube_template_duration_seconds': ('Время отрисовки шаблонов на запрос', TIME_BUCKETS),
+}
+COUNTERS = {
+    'yatube_requests_total': 'Обработано запросов',
+    'yatube_cache_hits_total': 'Попадания в кэш',
+    'yatube_cache_misses_total': 'Промахи кэша',
+    'yatube_n_plus_one_requests_total': 'Запросы, повторившие один SQL слишком много раз',
+}
+
+MISSING = object()
+
+
+class Histogram:
+    """Накопительная гистограмма с запуска процесса, как её ждёт Prometheus.
+
+    Значения только растут; окно (rate, histogram_quantile) задаётся в запросе к Prometheus.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def snapshot(self):
+        """Накопленные счётчики по границам (последняя — +Inf), сумма и число наблюдений."""
+        cumulative, running = [], 0
+        for count in self.counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, self.total, running
+
+
+def label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = defaultdict(float)
+
+    def observe(self, name, view, value):
+        with self.lock:
+            key = (name, view)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(HISTOGRAMS[name][1])
+            self.histograms[key].observe(value)
+
+    def inc(self, name, view, value=1):
+        with self.lock:
+            self.counters[(name, view)] += value
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, (help_text, buckets) in HISTOGRAMS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (metric, view), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative, total, count = histogram.snapshot()
+                    for bound, value in zip(buckets + ('+Inf',), cumulative):
+                        lines.append(f'{name}_bucket{{view="{label(view)}",le="{bound}"}} {value}')
+                    lines.append(f'{name}_sum{{view="{label(view)}"}} {total:.6f}')
+                    lines.append(f'{name}_count{{view="{label(view)}"}} {count}')
+            for name, help_text in COUNTERS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (metric, view), value in sorted(self.counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{{view="{label(view)}"}} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+_local = threading.local()
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self.template_time = 0.0
+        self.rendering = False
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.in_cache = False
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+@contextmanager
+def collect_stats():
+    """Собирает RequestStats текущего потока; MetricsMiddleware — для запроса, бенчмарки — для вызова."""
+    stats = RequestStats()
+    previous = current_stats()
+    _local.stats = stats
+    try:
+        yield stats
+    finally:
+        _local.stats = previous
+
+
+def count_query(execute, sql, params, many, context):
+    stats = current_stats()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_time += time.perf_counter() - started
+            stats.statements[sql] += 1
+
+
+def instrument_templates():
+    render = Template.render
+    if getattr(render, 'instrumented', False):
+        return
+
+    @wraps(render)
+    def timed_render(self, context=None, request=None):
+        stats = current_stats()
+        if stats is None or stats.rendering:
+            return render(self, context, request)
+        stats.rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            stats.rendering = False
+            stats.template_time += time.perf_counter() - started
+
+    timed_render.instrumented = True
+    Template.render = timed_render
+
+
+def instrument_cache(backend):
+    """Подсчёт попаданий и промахов get/get_many для класса бэкенда кэша."""
+    if getattr(backend.get, 'instrumented', False):
+        return
+    get, get_many = backend.get, backend.get_many
+
+    @wraps(get)
+    def counted_get(self, key, default=None, version=None):
+        stats = current_stats()
+        if stats is None or stats.in_cache:
+            return get(self, key, default, version)
+        stats.in_cache = True
+        try:
+            value = get(self, key, MISSING, version)
+        finally:
+            stats.in_cache = False
+        if value is MISSING:
+            stats.cache_misses += 1
+            return default
+        stats.cache_hits += 1
+        return value
+
+    @wraps(get_many)
+    def counted_get_many(self, keys, version=None):
+        stats = current_stats()
+        if stats is None or stats.in_cache:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        stats.in_cache = True
+        try:
+            found = get_many(self, keys, version)
+        finally:
+            stats.in_cache = False
+        stats.cache_hits += len(found)
+        stats.cache_misses += len(keys) - len(found)
+        return found
+
+    counted_get.instrumented = True
+    backend.get, backend.get_many = counted_get, counted_get_many
+
+
+class MetricsMiddleware:
+    """Собирает метрики каждого запроса; ставится первым в MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_templates()
+        for alias in settings.CACHES:
+            instrument_cache(type(caches[alias]))
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with collect_stats() as stats, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        self.record(request, stats, time.perf_counter() - started)
+        return response
+
+    def record(self, request, stats, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None else 'unresolved'
+        registry.inc('yatube_requests_total', view)
+        registry.observe('yatube_request_duration_seconds', view, duration)
+        registry.observe('yatube_sql_queries', view, stats.queries)
+        registry.observe('yatube_sql_duration_seconds', view, stats.sql_time)
+        registry.observe('yatube_template_duration_seconds', view, stats.template_time)
+        registry.inc('yatube_cache_hits_total', view, stats.cache_hits)
+        registry.inc('yatube_cache_misses_total', view, stats.cache_misses)
+        if stats.statements:
+            sql, repeats = stats.statements.most_common(1)[0]
+            if repeats >= settings.METRICS_N_PLUS_ONE_THRESHOLD:
+                registry.inc('yatube_n_plus_one_requests_total', view)
+                logger.warning('Возможный N+1 на %s (%s): %s раз выполнен запрос %s', request.path, view, repeats, sql)
+
+
+def metrics(request):
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,83 @@
+"""Чтение лент с реплик.
+
+Представления, обёрнутые в read_from_replica, читают из одной из баз
+DATABASE_REPLICAS; всё остальное — записи, сессии, формы — идёт в основную
+базу. После своей записи (pin_to_primary) автор ещё
+DATABASE_REPLICA_STICKY_SECONDS секунд читает из основной базы и видит
+запись, даже если реплика отстаёт.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+PINNED_UNTIL = 'primary_until'
+
+_replica = ContextVar('replica', default=None)
+
+
+def current_replica():
+    """Реплика, из которой читает текущий запрос, или None."""
+    return _replica.get()
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы: запись с реплики можно связать с записью из основной.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+@contextmanager
+def use_primary():
+    """Внутри блока чтение идёт из основной базы, например перед пересчётом с записью."""
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def pin_to_primary(request):
+    if settings.DATABASE_REPLICAS:
+        request.session[PINNED_UNTIL] = time.time() + settings.DATABASE_REPLICA_STICKY_SECONDS
+
+
+def is_pinned(request):
+    # request.user и сессия загружаются здесь, до переключения на реплику, то есть из основной базы.
+    return request.user.is_authenticated and request.session.get(PINNED_UNTIL, 0) > time.time()
+
+
+def read_from_replica(view):
+    """Чтение представления со случайной реплики, кроме авторов, недавно что-то записавших."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.DATABASE_REPLICAS or request.method not in ('GET', 'HEAD') or is_pinned(request):
+            return view(request, *args, **kwargs)
+        token = _replica.set(random.choice(settings.DATABASE_REPLICAS))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica.reset(token)
+    return wrapper
+
+
+def copy_to_replica(alias, using='default'):
+    """Перезаписывает SQLite-реплику копией основной базы через backup API."""
+    source, target = connections[using], connections[alias]
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
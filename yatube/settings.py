@@ -3,6 +3,9 @@ import os
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
+# Какой модуль настроек загружен; выбирается переменной окружения YATUBE_ENV (см. yatube/__init__.py).
+ENVIRONMENT = 'development'
+
 SECRET_KEY = '7(+!)emuwpbos!5bmu5inqkgcgh$9q6$vy8^b0#$3$8xe(u&x2'
 
 
@@ -19,6 +22,7 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'users',
     'posts',
+    'sorl.thumbnail',
     'django.contrib.sites',
     'django.contrib.flatpages',
     'django.contrib.admin',
@@ -30,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,11 +47,14 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -54,6 +62,9 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Без DEBUG шаблоны компилируются один раз и хранятся в памяти процесса;
+            # wsgi.py прогревает этот кэш при старте (см. yatube.template_cache).
+            'loaders': TEMPLATE_LOADERS if DEBUG else [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
         },
     },
 ]
@@ -63,11 +74,37 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # Обычный sqlite3 плюс PRAGMA из OPTIONS['pragmas'] на каждом соединении.
+        'ENGINE': 'yatube.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'OPTIONS': {
+            # Секунды ожидания блокировки записи, прежде чем вернуть «database is locked».
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                # Читатели не ждут писателя, а fsync нужен только на контрольной точке.
+                'journal_mode': 'wal',
+                'synchronous': 'normal',
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64 * 1024,
+                'temp_store': 'memory',
+            },
+        },
     }
 }
 
+# Реплики для чтения лент: пути к копиям базы SQLite через запятую в YATUBE_REPLICAS.
+# Копии обновляет команда sync_replicas; в тестах реплики смотрят в тестовую базу.
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], 'NAME': path, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+# Столько секунд после своей записи автор читает из основной базы.
+DATABASE_REPLICA_STICKY_SECONDS = 30
+# Страница, собранная по реплике, могла не увидеть последнюю запись, поэтому кэшируется недолго.
+DATABASE_REPLICA_PAGE_TIMEOUT = 30
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,8 +151,45 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+FILE_UPLOAD_HANDLERS = ['posts.uploadhandlers.HashingUploadHandler']
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40 * 10 ** 6
+
+POSTS_PER_PAGE = 10
+POSTS_NUMBERED_PAGES = 10
+
+TIMELINE_BACKEND = 'posts.timelines.DatabaseTimelineBackend'
+TIMELINE_MAX_LENGTH = 1000
+TIMELINE_FANOUT_THRESHOLD = 5000
+
+PAGE_CACHE_TIMEOUT = 60 * 60 * 6
+# Увеличить, если разметка страниц изменилась без изменения данных: старые ETag перестанут совпадать.
+PAGE_ETAG_VERSION = 1
+
+THUMBNAIL_ASYNC = True
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_RETRY_DELAY = 60 * 5
+
+IMAGE_DERIVATIVE_WIDTHS = (480, 960, 1440)
+IMAGE_DERIVATIVE_FORMATS = ('avif', 'webp')
+IMAGE_DERIVATIVE_QUALITY = 80
+
+# Комментарии и подписки пишет один поток пачками до WRITE_BATCH_SIZE штук (см. posts/writes.py).
+# В пачку попадает то, что накопилось, пока писалась предыдущая, и то, что пришло
+# за WRITE_BATCH_DELAY секунд. Запрос ждёт свою запись не дольше WRITE_BATCH_TIMEOUT секунд.
+WRITE_BATCH_ASYNC = True
+WRITE_BATCH_SIZE = 50
+WRITE_BATCH_DELAY = 0
+WRITE_BATCH_TIMEOUT = 30
+
+METRICS_N_PLUS_ONE_THRESHOLD = 10
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'yatube.sqlite_cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
     }
 }
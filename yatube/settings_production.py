@@ -0,0 +1,32 @@
+"""Настройки продакшена; включаются переменной окружения YATUBE_ENV=production.
+
+Всё, что здесь не переопределено, берётся из settings.py. Проверки горячего
+пути из yatube/checks.py предупреждают, если что-то из этого потеряется.
+"""
+import os
+from copy import deepcopy
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, MIDDLEWARE, SECRET_KEY, TEMPLATE_LOADERS, TEMPLATES
+
+ENVIRONMENT = 'production'
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)
+
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1,[::1]').split(',')
+
+DATABASES = deepcopy(DATABASES)
+# Соединения с основной базой и репликами живут между запросами, а не открываются заново на каждый.
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = int(os.environ.get('DJANGO_CONN_MAX_AGE', 600))
+
+# Сессия читается из общего кэша, в базу запрос идёт только при промахе.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+TEMPLATES = deepcopy(TEMPLATES)
+TEMPLATES[0]['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+
+# Сразу после MetricsMiddleware: время ответа включает сжатие.
+MIDDLEWARE = [MIDDLEWARE[0], 'django.middleware.gzip.GZipMiddleware', *MIDDLEWARE[1:]]
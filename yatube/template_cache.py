@@ -0,0 +1,43 @@
+"""Прогрев кэша шаблонов.
+
+Без DEBUG шаблоны загружает cached.Loader: каждый шаблон читается с диска
+и компилируется один раз за жизнь процесса. warm_templates делает это для
+всех шаблонов сразу при старте, чтобы первые запросы не платили за разбор,
+а синтаксические ошибки находились до того, как шаблон понадобится.
+"""
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.template.utils import get_app_template_dirs
+
+
+def template_dirs(engine):
+    return list(engine.dirs) + list(get_app_template_dirs('templates'))
+
+
+def template_names(engine):
+    """Имена всех шаблонов из DIRS и каталогов templates/ приложений, без повторов."""
+    names = set()
+    for directory in template_dirs(engine):
+        for root, _, files in os.walk(directory):
+            for file in files:
+                names.add(os.path.relpath(os.path.join(root, file), directory).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def is_cached(engine):
+    return any(isinstance(loader, CachedLoader) for loader in engine.template_loaders)
+
+
+def warm_templates(using='django'):
+    """Компилирует все шаблоны в кэш загрузчика; возвращает их имена и ошибки по именам."""
+    engine = engines[using].engine
+    names = template_names(engine)
+    errors = {}
+    for name in names:
+        try:
+            engine.get_template(name)
+        except (TemplateSyntaxError, UnicodeDecodeError) as error:
+            errors[name] = error
+    return names, errors
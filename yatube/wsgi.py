@@ -1,7 +1,23 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+from yatube import settings_module
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module())
 
 application = get_wsgi_application()
+
+if not settings.DEBUG:
+    from yatube.template_cache import warm_templates
+    warm_templates()
+
+if settings.ENVIRONMENT == 'production':
+    import logging
+
+    from django.core.checks import run_checks
+
+    from yatube.checks import PERFORMANCE
+    for message in run_checks(tags=[PERFORMANCE]):
+        logging.getLogger('yatube').warning('%s', message)